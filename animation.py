@@ -0,0 +1,391 @@
+from concurrent.futures import ProcessPoolExecutor
+import io
+import itertools
+import math
+import os
+from pathlib import Path
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+from PIL import Image
+
+from overlays import kde
+from rendering import _values, apply_settings, draw_cell
+
+
+ANIMATION_FORMATS = ["gif", "png"]
+
+# Frames are small, so they are rendered with a low resolution
+ANIMATION_DPI = 72
+
+# Every worker gets this many chunks of consecutive frames, so a slow
+# chunk doesn't keep the other workers waiting at the end
+CHUNKS_PER_WORKER = 4
+
+# Keys of cell specs that hold one value per point
+SERIES_KEYS = ["x", "y", "data", "labels"]
+
+
+# Frames ------------------------------------------------------------------
+# A cell of an animation is either a series cut into windows or a list of
+# snapshots under "frames", each a dict of keys replacing those of the cell.
+# Window None makes a growing window starting at the first value, step is
+# the number of values the window moves between frames. Cells with fewer
+# frames than the others keep showing their last one.
+
+
+def _length(spec: dict) -> int:
+    key = "data" if spec["type"] in ("histogram", "pie") else "y"
+    return len(spec.get(key, []))
+
+
+def _window_count(length: int, window, step: int) -> int:
+    if window is None:
+        return max(math.ceil(length / step), 1)
+    return max((length - window) // step + 1, 1)
+
+
+def _cell_count(spec: dict, window, step: int) -> int:
+    if "frames" in spec:
+        return len(spec["frames"])
+    return _window_count(_length(spec), window, step)
+
+
+# Function to count the frames of a figure spec
+def frame_count(figure_spec: dict, window=None, step: int = 1) -> int:
+    return max(
+        (_cell_count(spec, window, step) for spec in figure_spec["cells"]),
+        default=0,
+    )
+
+
+# Function to return the values of a cell shown in one frame. Density
+# curves of histograms are left to frame_spec
+def _cell_frame(spec: dict, index: int, window, step: int) -> dict:
+    index = min(index, _cell_count(spec, window, step) - 1)
+    if "frames" in spec:
+        cell = {**spec, **spec["frames"][index]}
+        del cell["frames"]
+        start, stop = 0, _length(cell)
+    else:
+        length = _length(spec)
+        if window is None:
+            start, stop = 0, min((index + 1) * step, length)
+        else:
+            start = index * step
+            stop = min(start + window, length)
+        cell = dict(spec)
+        for key in SERIES_KEYS:
+            if len(spec.get(key, [])) == length:
+                cell[key] = _values(spec, key)[start:stop]
+        overlay = spec.get("overlay")
+        if overlay:
+            cell["overlay"] = dict(overlay)
+            for key in ("x", "y"):
+                if len(overlay.get(key, [])) == length:
+                    cell["overlay"][key] = _values(overlay, key)[start:stop]
+
+    # Values without x keep their positions in the series
+    if cell["type"] not in ("histogram", "pie"):
+        if len(cell.get("x", [])) == 0:
+            cell["x"] = np.arange(start, stop)
+        if cell.get("overlay") and len(cell["overlay"].get("x", [])) == 0:
+            cell["overlay"] = {**cell["overlay"], "x": cell["x"]}
+    return cell
+
+
+# Function to estimate the density of a histogram frame as counts per bin
+def _kde_counts(data, edges) -> tuple[np.ndarray, np.ndarray] | None:
+    data = np.asarray(data, dtype=np.float64)
+    data = data[np.isfinite(data)]
+    try:
+        grid, density = kde(data)
+    except ValueError:
+        return None
+    return grid, density * len(data) * (edges[1] - edges[0])
+
+
+# Function to return the figure spec of one frame. Density curves of
+# histograms are estimated again from the values of the frame
+def frame_spec(
+    figure_spec: dict, index: int, window=None, step: int = 1
+) -> dict:
+    cells = []
+    for spec in figure_spec["cells"]:
+        cell = _cell_frame(spec, index, window, step)
+        if cell["type"] == "histogram" and cell.get("overlay"):
+            counts = _kde_counts(cell["data"], cell["bins"])
+            cell["overlay"] = counts and {
+                **cell["overlay"],
+                "x": counts[0],
+                "y": counts[1],
+            }
+        cells.append(cell)
+    return {**figure_spec, "cells": cells}
+
+
+# Function to join the snapshots of a cell into one series, to find the
+# bin edges and axis limits that fit all of them
+def _joined(spec: dict) -> dict:
+    if "frames" not in spec:
+        return spec
+    joined = {key: value for key, value in spec.items() if key != "frames"}
+    for key in SERIES_KEYS:
+        parts = [frame[key] for frame in spec["frames"] if key in frame]
+        if parts:
+            joined[key] = np.concatenate([np.asarray(p) for p in parts])
+    joined.pop("overlay", None)
+    return joined
+
+
+def _finite(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.isfinite(values)]
+
+
+# Function to fix histogram bin edges and the axis limits of all frames,
+# so consecutive frames are comparable and only the artists change.
+# Figures with pie cells keep automatic limits
+def prepare_animation(
+    figure_spec: dict, window=None, step: int = 1
+) -> dict:
+    count = frame_count(figure_spec, window, step)
+    cells = []
+    for spec in figure_spec["cells"]:
+        if spec["type"] == "histogram":
+            data = _finite(_joined(spec).get("data", []))
+            bins = spec.get("bins")
+            edges = np.histogram_bin_edges(
+                data, bins=int(bins) if np.isscalar(bins) and bins else 10
+            )
+            spec = {**spec, "bins": edges}
+            # Counts only grow with a growing window
+            indices = [count - 1] if window is None else range(count)
+            spec["peak"] = max(
+                np.histogram(
+                    _finite(_cell_frame(spec, i, window, step)["data"]), edges
+                )[0].max(initial=0)
+                for i in indices
+            )
+        cells.append(spec)
+    figure_spec = {**figure_spec, "cells": cells, "xlim": None, "ylim": None}
+    if any(spec["type"] == "pie" for spec in cells):
+        return figure_spec
+
+    axes = Figure().add_subplot()
+    for spec in cells:
+        if spec["type"] == "histogram":
+            edges = spec["bins"]
+            axes.update_datalim([(edges[0], 0), (edges[-1], spec["peak"])])
+        else:
+            draw_cell(axes, _joined(spec))
+    axes.autoscale_view()
+    bottom, top = axes.get_ylim()
+    if all(spec["type"] == "histogram" for spec in cells):
+        bottom = 0
+    figure_spec["xlim"] = axes.get_xlim()
+    figure_spec["ylim"] = (bottom, top)
+    return figure_spec
+
+
+# Rendering ---------------------------------------------------------------
+# Function to update the artists of a cell to the values of a frame.
+# Returns False when the artists can't show the frame and it has to be
+# drawn again
+def _update_cell(axes, artists, spec: dict) -> bool:
+    artist, overlay_artist = artists
+    match spec["type"]:
+        case "plot":
+            artist.set_data(_values(spec, "x"), _values(spec, "y"))
+        case "scatter":
+            x = axes.convert_xunits(_values(spec, "x"))
+            y = axes.convert_yunits(_values(spec, "y"))
+            artist.set_offsets(np.column_stack([x, y]))
+        case "bar":
+            x = _values(spec, "x")
+            y = _values(spec, "y")
+            if len(artist.patches) != len(y) or x.dtype.kind in "US":
+                return False
+            for patch, position, height in zip(
+                artist.patches, axes.convert_xunits(x), y
+            ):
+                patch.set_x(position - patch.get_width() / 2)
+                patch.set_height(height)
+        case "histogram":
+            counts, _ = np.histogram(_finite(spec["data"]), spec["bins"])
+            for patch, height in zip(artist.patches, counts):
+                patch.set_height(height)
+        case _:
+            return False
+
+    overlay = spec.get("overlay")
+    if overlay_artist is None:
+        return not overlay
+    if overlay:
+        overlay_artist.set_data(_values(overlay, "x"), _values(overlay, "y"))
+    else:
+        # The density of this frame can't be estimated
+        overlay_artist.set_data([], [])
+    return True
+
+
+def _artists_of(artist) -> list:
+    if hasattr(artist, "patches"):
+        return list(artist.patches)
+    return [] if artist is None else [artist]
+
+
+# This class renders frames of an animation on one figure. The axes,
+# ticks, labels and legend are drawn once into a background image, and
+# every next frame only updates the data of the cell artists and draws
+# them over a copy of the background
+class FrameRenderer:
+    def __init__(self, dpi: int = ANIMATION_DPI):
+        self.figure = Figure(dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        self.artists = None
+        self.background = None
+
+    @property
+    def size(self) -> tuple[int, int]:
+        width, height = self.canvas.get_width_height()
+        return int(width), int(height)
+
+    def _animated(self) -> list:
+        return [
+            artist
+            for pair in self.artists
+            for part in pair
+            for artist in _artists_of(part)
+        ]
+
+    # Draw the frame from scratch
+    def draw(self, frame: dict):
+        self.axes.clear()
+        self.artists = [draw_cell(self.axes, spec) for spec in frame["cells"]]
+        apply_settings(self.axes, frame)
+        if frame.get("xlim") is None:
+            # Limits follow the data, nothing can be reused
+            self.artists = None
+            self.canvas.draw()
+            return
+
+        self.axes.set_xlim(frame["xlim"])
+        self.axes.set_ylim(frame["ylim"])
+        for artist in self._animated():
+            artist.set_animated(True)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.blit()
+
+    def blit(self):
+        self.canvas.restore_region(self.background)
+        for artist in self._animated():
+            self.axes.draw_artist(artist)
+
+    def render(self, frame: dict) -> np.ndarray:
+        if self.artists is not None and all(
+            _update_cell(self.axes, artists, spec)
+            for artists, spec in zip(self.artists, frame["cells"])
+        ):
+            self.blit()
+        else:
+            self.draw(frame)
+        return np.asarray(self.canvas.buffer_rgba())
+
+
+def encode_frame(rgba: np.ndarray, fmt: str):
+    image = Image.fromarray(rgba[..., :3])
+    if fmt == "gif":
+        # Quantizing here spreads the slowest part of writing a GIF
+        # over the workers
+        return image.quantize(
+            method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, format="png", compress_level=1)
+    return buffer.getvalue()
+
+
+# Worker process ----------------------------------------------------------
+# Inherited by forked workers, so the figure spec is not pickled per chunk
+_job: tuple | None = None
+_renderer: FrameRenderer | None = None
+
+
+def _init_worker(figure_spec, window, step, dpi, fmt):
+    global _job, _renderer
+    _job = (figure_spec, window, step, fmt)
+    _renderer = FrameRenderer(dpi)
+
+
+def _render_frames(indices: range) -> list:
+    figure_spec, window, step, fmt = _job
+    return [
+        encode_frame(
+            _renderer.render(frame_spec(figure_spec, i, window, step)), fmt
+        )
+        for i in indices
+    ]
+
+
+# Function to render an animation of a figure spec in a pool of workers,
+# saving it as a GIF or as numbered PNG files next to path
+# (frames.png -> frames_00000.png, ...). Returns the number of frames
+def render_animation(
+    figure_spec: dict,
+    path,
+    window=None,
+    step: int = 1,
+    fps: float = 10,
+    workers=None,
+    dpi: int = ANIMATION_DPI,
+) -> int:
+    path = Path(path)
+    fmt = path.suffix[1:].lower()
+    if fmt not in ANIMATION_FORMATS:
+        raise ValueError(f"Unsupported animation format '{fmt}'")
+    if window is not None and window < 1:
+        raise ValueError("Window must be at least 1")
+    if step < 1:
+        raise ValueError("Step must be at least 1")
+    if fps <= 0:
+        raise ValueError("Frames per second must be above 0")
+    if not figure_spec.get("cells"):
+        raise ValueError("Nothing to animate")
+
+    figure_spec = prepare_animation(figure_spec, window, step)
+    count = frame_count(figure_spec, window, step)
+    workers = min(workers or os.cpu_count() or 1, count)
+    size = math.ceil(count / (workers * CHUNKS_PER_WORKER))
+    chunks = [
+        range(start, min(start + size, count))
+        for start in range(0, count, size)
+    ]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(figure_spec, window, step, dpi, fmt),
+    ) as pool:
+        # Chunks come back in order, whichever worker finishes first
+        frames = itertools.chain.from_iterable(
+            pool.map(_render_frames, chunks)
+        )
+        if fmt == "gif":
+            first = next(frames)
+            first.save(
+                path,
+                save_all=True,
+                append_images=frames,
+                duration=round(1000 / fps),
+                loop=0,
+            )
+        else:
+            for index, data in enumerate(frames):
+                (path.parent / f"{path.stem}_{index:05d}.png").write_bytes(
+                    data
+                )
+    return count
@@ -0,0 +1,61 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from parsing import parse_array, parse_parallel
+
+
+# Function to make comma separated text of random numbers
+def make_text(megabytes: float) -> str:
+    # About 20 characters per value with the separator
+    count = int(megabytes * 2**20 / 20)
+    values = np.random.default_rng(0).random(count) * 1000
+    return ", ".join(map(repr, values.tolist()))
+
+
+def best_time(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how parsing scales with the number of workers"
+    )
+    parser.add_argument("--megabytes", type=float, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[2**i for i in range(8) if 2**i <= (os.cpu_count() or 1)],
+    )
+    args = parser.parse_args()
+
+    text = make_text(args.megabytes)
+    size = len(text) / 2**20
+    print(f"Input: {size:.1f} MB, {text.count(',') + 1:,} values")
+
+    baseline = best_time(
+        lambda: parse_array(text, parallel=False), args.repeat
+    )
+    print(f"{'workers':>8} {'seconds':>8} {'MB/s':>8} {'speedup':>8}")
+    print(f"{'single':>8} {baseline:8.3f} {size / baseline:8.1f} {1:8.2f}")
+    for workers in args.workers:
+        seconds = best_time(
+            lambda: parse_parallel(text, workers), args.repeat
+        )
+        print(
+            f"{workers:>8} {seconds:8.3f} {size / seconds:8.1f} "
+            f"{baseline / seconds:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
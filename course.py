@@ -1,9 +1,25 @@
 from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+import csv
 from datetime import datetime
+from itertools import count, islice
+from pathlib import Path
+import math
+import re
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk
+from tkinter import filedialog, ttk
 
 import matplotlib.pyplot as plt
+import numpy as np
+
+from animation import ANIMATION_FORMATS, render_animation
+from dataset_store import DatasetStore
+from overlays import SMOOTHING_METHODS, kde, smooth
+from parsing import parse_array, to_array, to_array_of
+from rendering import IMAGE_FORMATS, RenderCache, apply_settings, draw_cell
 
 
 GRAPH_TYPES = ["plot", "scatter", "bar", "histogram", "pie"]
@@ -40,12 +56,474 @@ def get_list(string_var: tk.StringVar) -> list[float | str]:
     return processed_items
 
 
+# Ways to interpret numeric x values, "auto" keeps numbers as numbers
+X_TYPES = ["auto", "epoch s", "epoch ms", "epoch us", "epoch ns"]
+
+AGGREGATIONS = ["mean", "min", "max", "min/max"]
+
+DTYPES = ["float64", "float32", "int32"]
+
+# What to do with cell data that does not fit under the memory limit
+MEMORY_POLICIES = ["refuse", "downsample"]
+
+# Default limit for data held by cells and datasets
+MEMORY_LIMIT_MB = 2048
+
+INTERVAL_UNITS = {
+    "ns": 1,
+    "us": 10**3,
+    "ms": 10**6,
+    "s": 10**9,
+    "min": 60 * 10**9,
+    "h": 3600 * 10**9,
+    "d": 86400 * 10**9,
+}
+
+
+# Function to format a number of bytes for the status bar
+def format_bytes(size: int) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+
+
+# Arrays shared by every cell that references them as "@name": columns
+# loaded from files ("<file stem>/<column>") and large pastes ("paste/<n>")
+dataset_store = DatasetStore()
+
+# Number of rows read from a file at once
+IMPORT_CHUNK_ROWS = 65536
+
+# Pastes longer than this are parsed in the background and kept out of the
+# entry widget, which freezes on multi-megabyte text
+LARGE_PASTE_CHARS = 100_000
+
+ROW_NUMBER_COLUMN = "(row number)"
+
+# Number of undo steps kept
+HISTORY_LIMIT = 500
+
+# Edits made less than this many milliseconds apart are one undo step
+HISTORY_COALESCE_MS = 500
+
+
+# Function to share an array between cells under the given name. Other
+# datasets are spilled to disk if it doesn't fit under the memory limit
+def add_dataset(name: str, array: np.ndarray):
+    dataset_store.add(name, array, description=summarize(array))
+    relieve_memory()
+
+
+# Function to remove datasets that no cell is bound to and no undo step
+# refers to, so old pastes and imports free their memory and spill files
+def release_datasets():
+    referenced = {
+        value.strip()[1:]
+        for state in history.states()
+        for _, value in state.values
+        if isinstance(value, str) and value.strip().startswith("@")
+    }
+    for name in list(dataset_store):
+        if dataset_store.refs(name) == 0 and name not in referenced:
+            dataset_store.remove(name)
+
+
+# Function to describe an array in one line: count, dtype, min/max and
+# first/last values
+def summarize(array: np.ndarray) -> str:
+    if len(array) == 0:
+        return "No values"
+    dtype = "text" if array.dtype.kind in "UO" else array.dtype
+    text = f"{len(array):,} {dtype} values"
+    if array.dtype.kind == "f":
+        text += f", min {np.nanmin(array)}, max {np.nanmax(array)}"
+    elif array.dtype.kind in "iuM":
+        text += f", min {np.min(array)}, max {np.max(array)}"
+    return text + f", first {array[0]}, last {array[-1]}"
+
+
+# Function to check whether an array is a dataset or a view of one
+def is_shared(array: np.ndarray) -> bool:
+    return dataset_store.is_shared(array)
+
+
+# Function to estimate bytes a cell needs for an input without parsing it.
+# Datasets already in the target dtype, or converted to it for another
+# cell, are shared, so they cost nothing
+def estimate_bytes(text: str, dtype: np.dtype) -> int:
+    text = text.strip()
+    if text.startswith("@"):
+        name = text[1:]
+        if name not in dataset_store or dataset_store.has_converted(
+            name, dtype
+        ):
+            return 0
+        array = dataset_store.get(name)
+        if array.dtype == dtype:
+            return 0
+        return len(array) * dtype.itemsize
+    return (text.count(",") + 1) * dtype.itemsize if text else 0
+
+
+# Function to convert numeric values to the given precision, dates and
+# text keep their dtype
+def to_dtype(values: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    if values.dtype.kind not in "iuf" or values.dtype == dtype:
+        return values
+    if dtype.kind == "i":
+        if not np.all(np.isfinite(values)):
+            raise ValueError(f"Cannot store missing values as {dtype}")
+        info = np.iinfo(dtype)
+        if len(values) and (
+            values.min() < info.min or values.max() > info.max
+        ):
+            raise ValueError(f"Values out of {dtype} range")
+        values = np.rint(values)
+    return values.astype(dtype)
+
+
+# Function to compute a density curve scaled to histogram counts
+def kde_counts(data, bins: int) -> tuple[np.ndarray, np.ndarray]:
+    data = np.asarray(data, dtype=np.float64)
+    data = data[np.isfinite(data)]
+    grid, density = kde(data)
+    bin_width = (data.max() - data.min()) / bins
+    return grid, density * len(data) * bin_width
+
+
+def overlay_color(color: str) -> str:
+    return "gray" if color == "black" else "black"
+
+
+def overlay_label(label: str, name: str) -> str:
+    # Overlays of unlabeled cells stay out of the legend
+    return f"{label} ({name})" if label else ""
+
+
+# Function to convert cell input to values, resolving "@name" references
+# to shared datasets instead of parsing text. Values are converted to
+# dtype if given, keeping every step-th value. Cells converting a dataset
+# to the same dtype share the result
+def get_data(string_var: tk.StringVar, dtype=None, step=1) -> np.ndarray:
+    user_input = string_var.get().strip()
+    if user_input.startswith("@"):
+        name = user_input[1:]
+        if name not in dataset_store:
+            raise ValueError(f"Unknown dataset '{name}'")
+        if dtype is not None and step == 1:
+            return dataset_store.converted(name, dtype, to_dtype)
+        values = dataset_store.get(name)
+    else:
+        values = parse_array(user_input)
+
+    if step > 1:
+        values = np.ascontiguousarray(values[::step])
+    return values if dtype is None else to_dtype(values, dtype)
+
+
+def is_time(values) -> bool:
+    return np.asarray(values).dtype.kind == "M"
+
+
+# Function to convert numbers of seconds/milliseconds/... since the epoch
+# to datetime64[ns]
+def epoch_to_datetime(values, unit: str) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    scaled = np.rint(values * INTERVAL_UNITS[unit])
+    ticks = np.where(
+        np.isnan(values), np.iinfo(np.int64).min, scaled
+    ).astype(np.int64)
+    return ticks.view("datetime64[ns]")
+
+
+# Function to convert interval text like "1min" or "500ms" to nanoseconds
+def parse_interval(text: str) -> int:
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-z]+)\s*", text)
+    if not match or match.group(2) not in INTERVAL_UNITS:
+        raise ValueError(f"Invalid resample interval '{text}'")
+    step = round(float(match.group(1)) * INTERVAL_UNITS[match.group(2)])
+    if step <= 0:
+        raise ValueError(f"Invalid resample interval '{text}'")
+    return step
+
+
+# Function to aggregate y values into time buckets of the given interval.
+# "min/max" keeps both extremes of every bucket, so spikes stay visible
+def resample(x, y, interval: str, how: str) -> tuple[np.ndarray, np.ndarray]:
+    if not is_time(x):
+        raise ValueError("Resampling needs timestamps on the x axis")
+    x = np.asarray(x).astype("datetime64[ns]", copy=False)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) != len(y):
+        raise ValueError("x and y must have the same length")
+
+    valid = ~np.isnat(x)
+    x, y = x[valid], y[valid]
+    ticks = x.view(np.int64)
+    if len(ticks) > 1 and np.any(ticks[1:] < ticks[:-1]):
+        order = np.argsort(ticks, kind="stable")
+        ticks, y = ticks[order], y[order]
+    if len(ticks) == 0:
+        return x, y
+
+    step = parse_interval(interval)
+    buckets = ticks // step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    bucket_x = (buckets[starts] * step).view("datetime64[ns]")
+
+    match how:
+        case "mean":
+            counts = np.diff(np.r_[starts, len(y)])
+            return bucket_x, np.add.reduceat(y, starts) / counts
+        case "min":
+            return bucket_x, np.minimum.reduceat(y, starts)
+        case "max":
+            return bucket_x, np.maximum.reduceat(y, starts)
+        case "min/max":
+            low = np.minimum.reduceat(y, starts)
+            high = np.maximum.reduceat(y, starts)
+            return (
+                np.repeat(bucket_x, 2),
+                np.column_stack((low, high)).ravel(),
+            )
+    raise ValueError(f"Unknown aggregation '{how}'")
+
+
+def _concatenate_chunks(chunks: list[np.ndarray]) -> np.ndarray:
+    if not chunks:
+        return np.empty(0, dtype=np.float64)
+    kinds = {chunk.dtype.kind for chunk in chunks}
+    # Integer chunks with and without missing values concatenate to float
+    if len(kinds) > 1 and not kinds <= set("biuf"):
+        chunks = [chunk.astype(str) for chunk in chunks]
+    return np.concatenate(chunks)
+
+
+def _file_delimiter(path: Path) -> str:
+    return "\t" if path.suffix.lower() in (".tsv", ".tab") else ","
+
+
+# Function to read column names of a CSV/TSV/Parquet file
+def read_header(path: str) -> list[str]:
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Reading Parquet files requires pyarrow")
+        return list(pq.read_schema(path).names)
+
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file, delimiter=_file_delimiter(path))
+        return [name.strip() for name in next(reader, [])]
+
+
+# Function to read selected columns of a file in a single chunked pass.
+# Returns one typed array per column
+def read_columns(
+    path: str, columns: list[str], chunk_rows: int = IMPORT_CHUNK_ROWS
+) -> dict[str, np.ndarray]:
+    path = Path(path)
+    chunks: dict[str, list[np.ndarray]] = {column: [] for column in columns}
+
+    if path.suffix.lower() == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Reading Parquet files requires pyarrow")
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(
+            batch_size=chunk_rows, columns=columns
+        ):
+            for column in columns:
+                chunks[column].append(
+                    batch.column(column).to_numpy(zero_copy_only=False)
+                )
+        return {
+            column: _concatenate_chunks(chunks[column]) for column in columns
+        }
+
+    # The dtype of a column is settled by its first chunk with values,
+    # later chunks are converted to it. Empty chunks before that are
+    # counted and filled with missing values
+    dtypes: dict[str, np.dtype] = {}
+    leading = {column: 0 for column in columns}
+    text_columns = set()
+    for items in _csv_chunks(path, columns, chunk_rows):
+        for column in columns:
+            if column in text_columns:
+                continue
+            if column not in dtypes:
+                if not any(items[column]):
+                    leading[column] += len(items[column])
+                    continue
+                array = to_array(items[column])
+                dtypes[column] = array.dtype
+                if leading[column]:
+                    chunks[column].append(
+                        to_array_of([""] * leading[column], array.dtype)
+                    )
+                chunks[column].append(array)
+                continue
+            try:
+                chunks[column].append(
+                    to_array_of(items[column], dtypes[column])
+                )
+            except ValueError:
+                # Not all values fit the dtype, read the column as text
+                text_columns.add(column)
+                chunks[column] = []
+
+    if text_columns:
+        text = [column for column in columns if column in text_columns]
+        for items in _csv_chunks(path, text, chunk_rows):
+            for column in text:
+                chunks[column].append(np.asarray(items[column], dtype=str))
+    for column in columns:
+        if column not in dtypes and column not in text_columns:
+            chunks[column] = [np.full(leading[column], np.nan)]
+
+    return {column: _concatenate_chunks(chunks[column]) for column in columns}
+
+
+# Function to read selected columns of a CSV/TSV file in chunks of rows.
+# Yields a dict of column name -> list of stripped values per chunk
+def _csv_chunks(path: Path, columns: list[str], chunk_rows: int):
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file, delimiter=_file_delimiter(path))
+        header = [name.strip() for name in next(reader, [])]
+        for column in columns:
+            if column not in header:
+                raise ValueError(f"No column '{column}' in {path.name}")
+        indices = [header.index(column) for column in columns]
+
+        while True:
+            rows = list(islice(reader, chunk_rows))
+            if not rows:
+                break
+            rows = [row for row in rows if row]
+            yield {
+                column: [
+                    row[index].strip() if index < len(row) else ""
+                    for row in rows
+                ]
+                for column, index in zip(columns, indices)
+            }
+
+
+# Widgets ---------------------------------------------------------------
+# Data input of a cell. Small values are typed into the entry. Large pastes
+# are parsed in a background thread into a shared dataset, the entry only
+# keeps its "@name" reference and a summary is shown below it. The input
+# is bound to the dataset it references while the cell exists
+class DataInput:
+    pastes = count(1)
+
+    def __init__(self, parent, text, row):
+        self.var = tk.StringVar()
+        self.frame = tk.LabelFrame(
+            parent,
+            text=text,
+            bd=1,
+            relief="solid",
+        )
+        self.frame.grid(
+            row=row, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+        )
+        self.entry = tk.Entry(
+            self.frame,
+            textvariable=self.var,
+        )
+        self.entry.pack(padx=5, pady=5, fill="x")
+        self.entry.bind("<<Paste>>", self.paste)
+
+        self.summary = tk.Label(
+            self.frame,
+            anchor="w",
+            justify="left",
+            fg="gray",
+            wraplength=200,
+        )
+        self.var.trace_add("write", lambda *args: self.update_reference())
+
+        self.bound = None
+        self.result = None
+
+    def update_reference(self):
+        reference = self.var.get().strip()
+        name = reference[1:] if reference.startswith("@") else None
+        if name not in dataset_store:
+            name = None
+        if name != self.bound:
+            self.unbind()
+            if name is not None:
+                dataset_store.bind(name)
+            self.bound = name
+
+        if name is not None:
+            self.summary.config(text=dataset_store.description(name))
+            self.summary.pack(padx=5, pady=(0, 5), fill="x")
+        else:
+            self.summary.pack_forget()
+
+    def unbind(self):
+        if self.bound is not None:
+            dataset_store.unbind(self.bound)
+            self.bound = None
+
+    def paste(self, event):
+        try:
+            text = self.entry.clipboard_get()
+        except tk.TclError:
+            return None
+        if len(text) < LARGE_PASTE_CHARS:
+            # Let the entry paste small text as usual
+            return None
+
+        self.entry.config(state="disabled")
+        self.summary.config(text=f"Parsing {format_bytes(len(text))}...")
+        self.summary.pack(padx=5, pady=(0, 5), fill="x")
+        threading.Thread(
+            target=self.parse, args=(text,), daemon=True
+        ).start()
+        self.frame.after(50, self.check_parsed)
+        return "break"
+
+    # Runs in the background thread, must not touch Tk
+    def parse(self, text):
+        try:
+            self.result = parse_array(text)
+        except Exception as e:
+            self.result = e
+
+    def check_parsed(self):
+        if not self.frame.winfo_exists():
+            return
+        if self.result is None:
+            self.frame.after(50, self.check_parsed)
+            return
+
+        result, self.result = self.result, None
+        self.entry.config(state="normal")
+        if isinstance(result, Exception):
+            self.summary.config(text=f"Cannot parse: {result}")
+            return
+        name = f"paste/{next(self.pastes)}"
+        add_dataset(name, result)
+        self.var.set(f"@{name}")
+        update_memory_panel()
+
+
 # Classes for different graph types -----------------------------------
 # Base class for all cells
 class Cell(ABC):
+    ids = count(1)
+
     def __init__(self, frame):
         self.frame = frame
-        self.id = id(self)
+        self.id = next(self.ids)
 
         self.label = tk.StringVar()
 
@@ -69,8 +547,96 @@ class Cell(ABC):
         )
         self.remove_button.grid(row=0, column=1, padx=5, pady=5)
 
+        self.dtype = tk.StringVar(value=DTYPES[0])
+        self.dtype_combobox_frame = tk.LabelFrame(
+            self.frame,
+            text="Precision",
+            bd=1,
+            relief="solid",
+        )
+        self.dtype_combobox_frame.grid(
+            row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+        )
+        self.dtype_combobox = ttk.Combobox(
+            self.dtype_combobox_frame,
+            textvariable=self.dtype,
+            values=DTYPES,
+            state="readonly",
+        )
+        self.dtype_combobox.pack(padx=5, pady=5, fill="x")
+
+        # Arrays of the last load() and the inputs and precision they were
+        # loaded from
+        self.arrays: list[np.ndarray] = []
+        self.arrays_key = None
+        # Overlays computed from the arrays, key is the overlay settings
+        self.overlays: dict[tuple, object] = {}
+
+    # Values of the given inputs as arrays of the cell precision. Arrays
+    # are kept between builds and reloaded only when an input changes.
+    # Inputs listed in exact keep their parsed dtype
+    def load(self, names, exact=()) -> list[np.ndarray]:
+        texts = tuple(getattr(self, name).get() for name in names)
+        # The limit and the policy decide the downsampling stride
+        key = (
+            texts,
+            self.dtype.get(),
+            tuple(exact),
+            memory_limit_var.get(),
+            memory_policy_var.get(),
+        )
+        if key == self.arrays_key:
+            return self.arrays
+
+        # Free the old arrays first, they don't count against the limit
+        self.arrays, self.arrays_key = [], None
+        self.overlays = {}
+        dtype = np.dtype(self.dtype.get())
+        step = fit_memory_limit(
+            sum(estimate_bytes(text, dtype) for text in texts)
+        )
+
+        arrays = [
+            get_data(
+                getattr(self, name), None if name in exact else dtype, step
+            )
+            for name in names
+        ]
+
+        self.arrays, self.arrays_key = arrays, key
+        return arrays
+
+    # Overlay for the given settings, computed once per loaded data, so
+    # toggling it back on is instant
+    def cached_overlay(self, key, compute):
+        if key not in self.overlays:
+            self.overlays[key] = compute()
+        return self.overlays[key]
+
+    def inputs(self) -> list[DataInput]:
+        return [
+            value
+            for value in vars(self).values()
+            if isinstance(value, DataInput)
+        ]
+
+    # Tk variables of the cell by attribute name
+    def variables(self) -> dict[str, tk.Variable]:
+        return {
+            name: value
+            for name, value in vars(self).items()
+            if isinstance(value, tk.Variable)
+        }
+
+    # Bytes held by the cell itself, without shared datasets
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes for array in self.arrays if not is_shared(array)
+        )
+
+    # Dict with the cell type, parsed data and style, drawn by draw_cell
     @abstractmethod
-    def build(self):
+    def spec(self) -> dict:
         pass
 
 
@@ -79,55 +645,88 @@ class TwoDimensionalCell(Cell):
     def __init__(self, frame):
         super().__init__(frame)
 
-        self.x = tk.StringVar()
-        self.x_entry_frame = tk.LabelFrame(
+        self.x_input = DataInput(self.frame, "x", row=2)
+        self.x = self.x_input.var
+
+        self.y_input = DataInput(self.frame, "y", row=3)
+        self.y = self.y_input.var
+
+        self.color = tk.StringVar(value=COLORS[0])
+        self.color_combobox_frame = tk.LabelFrame(
             self.frame,
-            text="x",
+            text="Color",
             bd=1,
             relief="solid",
         )
-        self.x_entry_frame.grid(
-            row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+        self.color_combobox_frame.grid(
+            row=4, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
-        self.x_entry = tk.Entry(
-            self.x_entry_frame,
-            textvariable=self.x,
+        self.color_combobox = ttk.Combobox(
+            self.color_combobox_frame,
+            textvariable=self.color,
+            values=COLORS,
+            state="readonly",
         )
-        self.x_entry.pack(padx=5, pady=5, fill="x")
+        self.color_combobox.pack(padx=5, pady=5, fill="x")
 
-        self.y = tk.StringVar()
-        self.y_entry_frame = tk.LabelFrame(
+        self.x_type = tk.StringVar(value=X_TYPES[0])
+        self.x_type_combobox_frame = tk.LabelFrame(
             self.frame,
-            text="y",
+            text="x values",
             bd=1,
             relief="solid",
         )
-        self.y_entry_frame.grid(
-            row=2, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+        self.x_type_combobox_frame.grid(
+            row=5, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
-        self.y_entry = tk.Entry(
-            self.y_entry_frame,
-            textvariable=self.y,
+        self.x_type_combobox = ttk.Combobox(
+            self.x_type_combobox_frame,
+            textvariable=self.x_type,
+            values=X_TYPES,
+            state="readonly",
         )
-        self.y_entry.pack(padx=5, pady=5, fill="x")
+        self.x_type_combobox.pack(padx=5, pady=5, fill="x")
 
-        self.color = tk.StringVar(value=COLORS[0])
-        self.color_combobox_frame = tk.LabelFrame(
+        self.resample_interval = tk.StringVar()
+        self.resample_how = tk.StringVar(value=AGGREGATIONS[0])
+        self.resample_frame = tk.LabelFrame(
             self.frame,
-            text="Color",
+            text="Resample (e.g. 1min)",
             bd=1,
             relief="solid",
         )
-        self.color_combobox_frame.grid(
-            row=3, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+        self.resample_frame.grid(
+            row=6, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
-        self.color_combobox = ttk.Combobox(
-            self.color_combobox_frame,
-            textvariable=self.color,
-            values=COLORS,
+        self.resample_entry = tk.Entry(
+            self.resample_frame,
+            textvariable=self.resample_interval,
+            width=8,
+        )
+        self.resample_entry.pack(side="left", padx=5, pady=5)
+        self.resample_combobox = ttk.Combobox(
+            self.resample_frame,
+            textvariable=self.resample_how,
+            values=AGGREGATIONS,
             state="readonly",
+            width=8,
         )
-        self.color_combobox.pack(padx=5, pady=5, fill="x")
+        self.resample_combobox.pack(side="left", padx=5, pady=5)
+
+    # Parsed x and y with epoch conversion and time resampling applied
+    def get_xy(self):
+        x_type = self.x_type.get()
+        # Epoch numbers need full precision before conversion to dates
+        exact = ["x"] if x_type != "auto" else []
+        x, y = self.load(["x", "y"], exact)
+
+        if x_type != "auto" and len(x):
+            x = epoch_to_datetime(x, x_type.split()[1])
+        if self.resample_interval.get().strip():
+            x, y = resample(
+                x, y, self.resample_interval.get(), self.resample_how.get()
+            )
+        return x, y
 
 
 class PlotCell(TwoDimensionalCell):
@@ -142,7 +741,7 @@ class PlotCell(TwoDimensionalCell):
             relief="solid",
         )
         self.linewidth_spinbox_frame.grid(
-            row=4, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+            row=7, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
         self.linewidth_spinbox = ttk.Spinbox(
             self.linewidth_spinbox_frame,
@@ -163,7 +762,7 @@ class PlotCell(TwoDimensionalCell):
             relief="solid",
         )
         self.linestyle_combobox_frame.grid(
-            row=5, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+            row=8, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
         self.linestyle_combobox = ttk.Combobox(
             self.linestyle_combobox_frame,
@@ -181,7 +780,7 @@ class PlotCell(TwoDimensionalCell):
             relief="solid",
         )
         self.marker_combobox_frame.grid(
-            row=6, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+            row=9, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
         self.marker_combobox = ttk.Combobox(
             self.marker_combobox_frame,
@@ -191,30 +790,69 @@ class PlotCell(TwoDimensionalCell):
         )
         self.marker_combobox.pack(padx=5, pady=5, fill="x")
 
-    def build(self):
-        x = get_list(self.x)
-        y = get_list(self.y)
-
-        if not x:
-            plt.plot(
-                y,
-                color=self.color.get(),
-                label=self.label.get(),
-                linewidth=self.linewidth.get(),
-                linestyle=self.linestyle.get(),
-                marker=self.marker.get(),
-            )
-        else:
-            plt.plot(
-                x,
-                y,
-                color=self.color.get(),
-                label=self.label.get(),
-                linewidth=self.linewidth.get(),
-                linestyle=self.linestyle.get(),
-                marker=self.marker.get(),
-                markersize=float(self.linewidth.get()) + 4.5,
+        self.smoothing = tk.StringVar(value=SMOOTHING_METHODS[0])
+        self.smoothing_window = tk.StringVar(value="21")
+        self.smoothing_frame = tk.LabelFrame(
+            self.frame,
+            text="Smoothing (method, window)",
+            bd=1,
+            relief="solid",
+        )
+        self.smoothing_frame.grid(
+            row=10, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+        )
+        self.smoothing_combobox = ttk.Combobox(
+            self.smoothing_frame,
+            textvariable=self.smoothing,
+            values=SMOOTHING_METHODS,
+            state="readonly",
+            width=13,
+        )
+        self.smoothing_combobox.pack(side="left", padx=5, pady=5)
+        self.smoothing_window_spinbox = ttk.Spinbox(
+            self.smoothing_frame,
+            from_=1,
+            to=100_000,
+            textvariable=self.smoothing_window,
+            increment=2,
+            width=6,
+        )
+        self.smoothing_window_spinbox.pack(side="left", padx=5, pady=5)
+
+    def spec(self):
+        x, y = self.get_xy()
+
+        overlay = None
+        method = self.smoothing.get()
+        if method != "None":
+            window = int(float(self.smoothing_window.get()))
+            key = (
+                method,
+                window,
+                self.x_type.get(),
+                self.resample_interval.get(),
+                self.resample_how.get(),
             )
+            overlay = {
+                "x": x,
+                "y": self.cached_overlay(
+                    key, lambda: smooth(y, method, window)
+                ),
+                "color": overlay_color(self.color.get()),
+                "label": overlay_label(self.label.get(), method),
+            }
+
+        return {
+            "type": "plot",
+            "x": x,
+            "y": y,
+            "color": self.color.get(),
+            "label": self.label.get(),
+            "linewidth": float(self.linewidth.get()),
+            "linestyle": self.linestyle.get(),
+            "marker": self.marker.get(),
+            "overlay": overlay,
+        }
 
 
 class ScatterCell(TwoDimensionalCell):
@@ -229,7 +867,7 @@ class ScatterCell(TwoDimensionalCell):
             relief="solid",
         )
         self.marker_combobox_frame.grid(
-            row=4, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+            row=7, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
         self.marker_combobox = ttk.Combobox(
             self.marker_combobox_frame,
@@ -247,7 +885,7 @@ class ScatterCell(TwoDimensionalCell):
             relief="solid",
         )
         self.markersize_spinbox_frame.grid(
-            row=5, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+            row=8, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
         self.markersize_spinbox = ttk.Spinbox(
             self.markersize_spinbox_frame,
@@ -259,47 +897,39 @@ class ScatterCell(TwoDimensionalCell):
         )
         self.markersize_spinbox.pack(padx=5, pady=5, fill="x")
 
-    def build(self):
-        x = get_list(self.x)
-        y = get_list(self.y)
+    def spec(self):
+        x, y = self.get_xy()
 
-        plt.scatter(
-            x,
-            y,
-            color=self.color.get(),
-            label=self.label.get(),
-            marker=self.marker.get(),
-            s=float(self.markersize.get()) ** 2,
-        )
+        return {
+            "type": "scatter",
+            "x": x,
+            "y": y,
+            "color": self.color.get(),
+            "label": self.label.get(),
+            "marker": self.marker.get(),
+            "markersize": float(self.markersize.get()),
+        }
 
 
 class BarCell(TwoDimensionalCell):
-    def build(self):
-        x = get_list(self.x)
-        y = get_list(self.y)
+    def spec(self):
+        x, y = self.get_xy()
 
-        plt.bar(x, y, color=self.color.get(), label=self.label.get())
+        return {
+            "type": "bar",
+            "x": x,
+            "y": y,
+            "color": self.color.get(),
+            "label": self.label.get(),
+        }
 
 
 class HistogramCell(Cell):
     def __init__(self, frame):
         super().__init__(frame)
 
-        self.data = tk.StringVar()
-        self.data_entry_frame = tk.LabelFrame(
-            self.frame,
-            text="Data",
-            bd=1,
-            relief="solid",
-        )
-        self.data_entry_frame.grid(
-            row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
-        )
-        self.data_entry = tk.Entry(
-            self.data_entry_frame,
-            textvariable=self.data,
-        )
-        self.data_entry.pack(padx=5, pady=5, fill="x")
+        self.data_input = DataInput(self.frame, "Data", row=2)
+        self.data = self.data_input.var
 
         self.bins = tk.StringVar()
         self.bins_entry_frame = tk.LabelFrame(
@@ -309,7 +939,7 @@ class HistogramCell(Cell):
             relief="solid",
         )
         self.bins_entry_frame.grid(
-            row=2, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+            row=3, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
         self.bins_entry = tk.Entry(
             self.bins_entry_frame,
@@ -325,7 +955,7 @@ class HistogramCell(Cell):
             relief="solid",
         )
         self.color_combobox_frame.grid(
-            row=3, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
+            row=4, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
         )
         self.color_combobox = ttk.Combobox(
             self.color_combobox_frame,
@@ -335,18 +965,41 @@ class HistogramCell(Cell):
         )
         self.color_combobox.pack(padx=5, pady=5, fill="x")
 
-    def build(self):
-        data = get_list(self.data)
+        self.kde = tk.BooleanVar(value=False)
+        self.kde_checkbutton = tk.Checkbutton(
+            self.frame,
+            text="Density curve (KDE)",
+            variable=self.kde,
+        )
+        self.kde_checkbutton.grid(
+            row=5, column=0, columnspan=2, padx=5, pady=5, sticky="w"
+        )
+
+    def spec(self):
         bins_str = self.bins.get()
-        if not bins_str:
-            plt.hist(data, color=self.color.get(), label=self.label.get())
-        else:
-            plt.hist(
-                data,
-                bins=int(bins_str),
-                color=self.color.get(),
-                label=self.label.get(),
+        bins = int(bins_str) if bins_str else None
+        data = self.load(["data"])[0]
+
+        overlay = None
+        if self.kde.get():
+            grid, counts = self.cached_overlay(
+                ("KDE", bins), lambda: kde_counts(data, bins or 10)
             )
+            overlay = {
+                "x": grid,
+                "y": counts,
+                "color": overlay_color(self.color.get()),
+                "label": overlay_label(self.label.get(), "KDE"),
+            }
+
+        return {
+            "type": "histogram",
+            "data": data,
+            "bins": bins,
+            "color": self.color.get(),
+            "label": self.label.get(),
+            "overlay": overlay,
+        }
 
 
 class PieCell(Cell):
@@ -355,29 +1008,15 @@ class PieCell(Cell):
 
         self.label_entry_frame.config(text="Labels")
 
-        self.data = tk.StringVar()
-        self.data_entry_frame = tk.LabelFrame(
-            self.frame,
-            text="Data",
-            bd=1,
-            relief="solid",
-        )
-        self.data_entry_frame.grid(
-            row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew"
-        )
-        self.data_entry = tk.Entry(
-            self.data_entry_frame,
-            textvariable=self.data,
-        )
-        self.data_entry.pack(padx=5, pady=5, fill="x")
+        self.data_input = DataInput(self.frame, "Data", row=2)
+        self.data = self.data_input.var
 
-    def build(self):
-        data = get_list(self.data)
-        labels = get_list(self.label)
-        if not labels:
-            plt.pie(data)
-        else:
-            plt.pie(data, labels=labels)
+    def spec(self):
+        return {
+            "type": "pie",
+            "data": self.load(["data"])[0],
+            "labels": get_list(self.label),
+        }
 
 
 # Class to manipulate cells ---------------------------------------------
@@ -400,6 +1039,7 @@ class CellManager:
         ):
             return
 
+        history.commit()
         frame = tk.LabelFrame(
             cells_list,
             text=graph_type,
@@ -433,8 +1073,61 @@ class CellManager:
                     menu.entryconfig(i, state="disabled")
 
         self.cells[cell.id] = cell
+        history.watch(cell)
+        history.commit()
+        return cell
+
+    # Read selected columns of a file once and create a cell per column,
+    # with x bound to the shared index column
+    def import_columns(self, path, columns, index_column, graph_type):
+        stem = Path(path).stem
+        names = list(columns)
+        if index_column != ROW_NUMBER_COLUMN and index_column not in names:
+            names.append(index_column)
+
+        arrays = read_columns(path, names)
+        if index_column == ROW_NUMBER_COLUMN:
+            length = len(arrays[names[0]]) if names else 0
+            arrays[ROW_NUMBER_COLUMN] = np.arange(length)
+
+        # A file imported again, or another file with the same name, gets
+        # datasets of its own, so cells of the earlier import keep theirs
+        taken = {name.split("/", 1)[0] for name in dataset_store}
+        prefix = stem
+        for number in count(2):
+            if prefix not in taken:
+                break
+            prefix = f"{stem} ({number})"
+        stem = prefix
+
+        created = 0
+        # Datasets without cells yet are released when a step is recorded
+        with history.group():
+            for name, array in arrays.items():
+                add_dataset(f"{stem}/{name}", array)
+            for column in columns:
+                cell = self.create_cell(graph_type)
+                if cell is None:
+                    break
+                cell.label.set(column)
+                if isinstance(cell, TwoDimensionalCell):
+                    cell.x.set(f"@{stem}/{index_column}")
+                    cell.y.set(f"@{stem}/{column}")
+                else:
+                    cell.data.set(f"@{stem}/{column}")
+                created += 1
+
+        add_status_text(
+            f"Imported {created} of {len(columns)} columns "
+            f"from {Path(path).name}"
+        )
+        update_memory_panel()
 
     def delete_cell(self, cell_id):
+        # Pending edits of the cell stay a separate undo step
+        history.commit()
+        for data_input in self.cells[cell_id].inputs():
+            data_input.unbind()
         self.cells[cell_id].frame.destroy()
         del self.cells[cell_id]
 
@@ -443,45 +1136,355 @@ class CellManager:
             for i in range(menu.index("end") + 1):
                 menu.entryconfig(i, state="normal")
 
-    def show(self):
+        history.commit()
+        update_memory_panel()
+
+    def settings(self) -> dict:
+        return {
+            "title": title_var.get(),
+            "xlabel": xlabel_var.get(),
+            "ylabel": ylabel_var.get(),
+            "legend": legend_var.get(),
+            "grid": grid_var.get(),
+        }
+
+    def mark_error(self, cell, error):
+        add_status_text(f"Error in red cell {cell.id}: {error}")
+        cell.frame.config(bg="#FFCCCC")
+
+    # Collect specs of all cells and figure settings, marking a cell red if
+    # its input cannot be parsed
+    def figure_spec(self) -> dict | None:
         if not self.cells:
             add_status_text("No cells to plot!")
-            return
+            return None
 
         # Make all frames white
         for cell in self.cells.values():
             cell.frame.config(bg=cells_list.cget("bg"))
 
-        plt.figure()
+        specs = []
         for cell in self.cells.values():
             try:
-                cell.build()
+                specs.append(cell.spec())
             except Exception as e:
-                add_status_text(f"Error in red cell {cell.id}: {e}")
-                cell.frame.config(bg="#FFCCCC")
+                self.mark_error(cell, e)
+                update_memory_panel()
+                return None
+
+        update_memory_panel()
+        return {"cells": specs, **self.settings()}
+
+    # Bytes held by cells, the undo history and datasets in memory. Arrays
+    # used by several cells, like a dataset converted to the same
+    # precision, count once
+    def memory_in_use(self) -> int:
+        arrays = {
+            id(array): array
+            for cell in self.cells.values()
+            for array in cell.arrays
+            if not is_shared(array)
+        }
+        return (
+            dataset_store.resident_bytes()
+            + history.nbytes()
+            + sum(array.nbytes for array in arrays.values())
+        )
+
+    def show(self):
+        figure_spec = self.figure_spec()
+        if figure_spec is None:
+            return
+
+        plt.figure()
+        for cell, spec in zip(self.cells.values(), figure_spec["cells"]):
+            try:
+                draw_cell(plt.gca(), spec)
+            except Exception as e:
+                self.mark_error(cell, e)
                 plt.close()
                 return
 
         add_status_text("Successfully plotted!")
 
-        if title_var.get():
-            plt.title(title_var.get())
-        if xlabel_var.get():
-            plt.xlabel(xlabel_var.get())
-        if ylabel_var.get():
-            plt.ylabel(ylabel_var.get())
-        if legend_var.get():
-            plt.legend()
-        if grid_var.get():
-            plt.grid()
+        apply_settings(plt.gca(), figure_spec)
 
         plt.show()
 
+    # Save the figure as PNG or SVG, reusing the image from the render cache
+    # when an identical figure was rendered before
+    def save(self, path):
+        fmt = Path(path).suffix[1:].lower()
+        if fmt not in IMAGE_FORMATS:
+            add_status_text(f"Unsupported image format '{fmt}'")
+            return
+
+        figure_spec = self.figure_spec()
+        if figure_spec is None:
+            return
+
+        try:
+            cache = get_render_cache()
+            Path(path).write_bytes(cache.render(figure_spec, fmt))
+        except Exception as e:
+            add_status_text(f"Error while saving: {e}")
+            return
+
+        stats = cache.stats()
+        add_status_text(
+            f"Saved {Path(path).name} (cache hit rate {stats['hit_rate']:.0%},"
+            f" {format_bytes(stats['stored_bytes'])} stored)"
+        )
+
+    # Save an animation of the figure as GIF or PNG frames, every cell
+    # showing a window of its values that moves by step values per frame.
+    # Window None shows a growing window from the first value
+    def animate(self, path, window=None, step=1, fps=10):
+        fmt = Path(path).suffix[1:].lower()
+        if fmt not in ANIMATION_FORMATS:
+            add_status_text(f"Unsupported animation format '{fmt}'")
+            return
+
+        figure_spec = self.figure_spec()
+        if figure_spec is None:
+            return
+
+        start = time.perf_counter()
+        try:
+            count = render_animation(figure_spec, path, window, step, fps)
+        except Exception as e:
+            add_status_text(f"Error while animating: {e}")
+            return
+
+        seconds = time.perf_counter() - start
+        add_status_text(
+            f"Saved {count} frames to {Path(path).name} in {seconds:.1f} s"
+        )
+
+
+# Undo history ------------------------------------------------------------
+# State of one cell at a point of the history: its type, the values of its
+# variables and the arrays parsed from them. Values and arrays are only
+# referenced, and snapshots reuse the states of cells that didn't change,
+# so an undo step costs only what was changed
+class CellState:
+    def __init__(self, cell: Cell):
+        self.id = cell.id
+        self.graph_type = cell.frame.cget("text")
+        self.values = tuple(
+            (name, var.get()) for name, var in cell.variables().items()
+        )
+        self.keep_arrays(cell)
+
+    # Arrays are only a cache checked against the values when loaded, so
+    # a state shared by several snapshots can keep the latest ones.
+    # Datasets are not kept, so spilling them frees their memory
+    def keep_arrays(self, cell: Cell):
+        if any(is_shared(array) for array in cell.arrays):
+            self.arrays, self.arrays_key, self.overlays = [], None, {}
+            return
+        self.arrays = cell.arrays
+        self.arrays_key = cell.arrays_key
+        self.overlays = cell.overlays
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, CellState)
+            and self.id == other.id
+            and self.graph_type == other.graph_type
+            and self.values == other.values
+        )
+
+    # Set the cell variables to the state. Parsed arrays come back with
+    # them, so nothing is parsed again
+    def apply(self, cell: Cell):
+        variables = cell.variables()
+        for name, value in self.values:
+            if variables[name].get() != value:
+                variables[name].set(value)
+        cell.arrays, cell.arrays_key = self.arrays, self.arrays_key
+        cell.overlays = self.overlays
+
+
+# This class records snapshots of all cells and figure settings for undo
+# and redo. A snapshot is a tuple of cell states and a tuple of setting
+# values. Edits mark their cell dirty and are recorded together once no
+# edit followed for HISTORY_COALESCE_MS, creating and deleting a cell is
+# recorded at once
+class History:
+    def __init__(self, settings: dict[str, tk.Variable]):
+        self.settings = settings
+        self.undo_steps: deque = deque(maxlen=HISTORY_LIMIT)
+        self.redo_steps: list = []
+        self.dirty: set[int] = set()
+        self.pending = None
+        self.restoring = False
+        self.grouping = 0
+        self.current = ((), ())
+        self.current = self.snapshot()
+
+        for var in settings.values():
+            var.trace_add("write", lambda *args: self.schedule())
+
+    def watch(self, cell: Cell):
+        for var in cell.variables().values():
+            var.trace_add("write", lambda *args: self.changed(cell))
+
+    def changed(self, cell: Cell):
+        if not self.restoring:
+            self.dirty.add(cell.id)
+            self.schedule()
+
+    def schedule(self):
+        if self.restoring:
+            return
+        if self.pending is not None:
+            root.after_cancel(self.pending)
+        self.pending = root.after(HISTORY_COALESCE_MS, self.commit)
+
+    def snapshot(self) -> tuple:
+        previous = {state.id: state for state in self.current[0]}
+        states = []
+        for cell in cell_manager.cells.values():
+            state = previous.get(cell.id)
+            if state is None or cell.id in self.dirty:
+                new_state = CellState(cell)
+                if new_state != state:
+                    state = new_state
+            state.keep_arrays(cell)
+            states.append(state)
+        values = tuple(var.get() for var in self.settings.values())
+        return tuple(states), values
+
+    # Record the current cells and settings as a step if anything changed
+    def commit(self):
+        if self.pending is not None:
+            root.after_cancel(self.pending)
+            self.pending = None
+        if self.restoring or self.grouping:
+            return
+
+        snapshot = self.snapshot()
+        self.dirty.clear()
+        if snapshot == self.current:
+            return
+        self.undo_steps.append(self.current)
+        self.redo_steps.clear()
+        self.current = snapshot
+        # Steps dropped from the history may have held the last reference
+        release_datasets()
+
+    # Changes made inside are recorded as one step
+    @contextmanager
+    def group(self):
+        self.commit()
+        self.grouping += 1
+        try:
+            yield
+        finally:
+            self.grouping -= 1
+            self.commit()
+
+    def undo(self):
+        # Edits not recorded yet are undone first
+        self.commit()
+        if not self.undo_steps:
+            add_status_text("Nothing to undo!")
+            return
+        self.redo_steps.append(self.current)
+        self.restore(self.undo_steps.pop())
+
+    def redo(self):
+        self.commit()
+        if not self.redo_steps:
+            add_status_text("Nothing to redo!")
+            return
+        self.undo_steps.append(self.current)
+        self.restore(self.redo_steps.pop())
+
+    # Make cells and settings match a snapshot, touching only the cells
+    # whose state differs from the current one
+    def restore(self, snapshot: tuple):
+        states, values = snapshot
+        current = {state.id: state for state in self.current[0]}
+        ids = {state.id for state in states}
+
+        self.restoring = True
+        try:
+            # Delete first, a pie cell can only be created alone
+            for cell_id in [i for i in cell_manager.cells if i not in ids]:
+                cell_manager.delete_cell(cell_id)
+            for state in states:
+                cell = cell_manager.cells.get(state.id)
+                if cell is None:
+                    cell = cell_manager.create_cell(state.graph_type)
+                    del cell_manager.cells[cell.id]
+                    cell.id = state.id
+                    cell_manager.cells[cell.id] = cell
+                elif current.get(state.id) is state:
+                    continue
+                state.apply(cell)
+            for var, value in zip(self.settings.values(), values):
+                if var.get() != value:
+                    var.set(value)
+        finally:
+            self.restoring = False
+        self.current = snapshot
+        self.dirty.clear()
+
+        # Cells brought back go to their old place
+        order = [state.id for state in states]
+        if list(cell_manager.cells) != order:
+            cell_manager.cells = {i: cell_manager.cells[i] for i in order}
+            for cell in cell_manager.cells.values():
+                cell.frame.pack_forget()
+                cell.frame.pack(side="left", anchor="n", padx=10, pady=10)
+        update_memory_panel()
+
+    # States of all recorded snapshots, each shared state once
+    def states(self) -> list[CellState]:
+        states = {
+            id(state): state
+            for states, _ in [*self.undo_steps, *self.redo_steps, self.current]
+            for state in states
+        }
+        return list(states.values())
+
+    # Bytes of parsed arrays kept only by the history, like the arrays of
+    # deleted cells
+    def nbytes(self) -> int:
+        live = {
+            id(array)
+            for cell in cell_manager.cells.values()
+            for array in cell.arrays
+        }
+        arrays = {
+            id(array): array
+            for state in self.states()
+            for array in state.arrays
+            if id(array) not in live and not is_shared(array)
+        }
+        return sum(array.nbytes for array in arrays.values())
+
+    # Let go of the arrays kept only by the history, a restored step parses
+    # its values again. Returns the number of bytes freed
+    def drop_arrays(self) -> int:
+        nbytes = self.nbytes()
+        live = {
+            id(array)
+            for cell in cell_manager.cells.values()
+            for array in cell.arrays
+        }
+        for state in self.states():
+            if any(id(array) not in live for array in state.arrays):
+                state.arrays, state.arrays_key, state.overlays = [], None, {}
+        return nbytes
+
 
 # GUI ---------------------------------------------------------------------
 root = tk.Tk()
 root.title("Plotting App")
-root.geometry("530x550")
+root.geometry("740x620")
 
 # Navigation --------------------------------------------------------------
 navigation = tk.LabelFrame(
@@ -513,6 +1516,119 @@ create_cell = tk.Button(
 )
 create_cell.pack(side="left", padx=10, pady=5)
 
+
+# Function to open a dialog for importing columns of a file as cells
+def open_import_dialog():
+    path = filedialog.askopenfilename(
+        title="Import file",
+        filetypes=[
+            ("Data files", "*.csv *.tsv *.parquet"),
+            ("All files", "*.*"),
+        ],
+    )
+    if not path:
+        return
+    try:
+        header = read_header(path)
+    except (OSError, ValueError) as e:
+        add_status_text(f"Cannot read {Path(path).name}: {e}")
+        return
+
+    dialog = tk.Toplevel(root)
+    dialog.title(f"Import {Path(path).name}")
+
+    columns_frame = tk.LabelFrame(
+        dialog,
+        text="Columns",
+        bd=1,
+        relief="solid",
+    )
+    columns_frame.pack(padx=10, pady=5, fill="both", expand=True)
+    columns_listbox = tk.Listbox(
+        columns_frame,
+        selectmode="multiple",
+        exportselection=False,
+    )
+    for name in header:
+        columns_listbox.insert(tk.END, name)
+    columns_listbox.pack(padx=5, pady=5, fill="both", expand=True)
+
+    index_var = tk.StringVar(value=ROW_NUMBER_COLUMN)
+    index_frame = tk.LabelFrame(
+        dialog,
+        text="Index column (x)",
+        bd=1,
+        relief="solid",
+    )
+    index_frame.pack(padx=10, pady=5, fill="x")
+    index_combobox = ttk.Combobox(
+        index_frame,
+        textvariable=index_var,
+        values=[ROW_NUMBER_COLUMN, *header],
+        state="readonly",
+    )
+    index_combobox.pack(padx=5, pady=5, fill="x")
+
+    import_types = [t for t in GRAPH_TYPES if t != "pie"]
+    type_var = tk.StringVar(value=import_types[0])
+    type_frame = tk.LabelFrame(
+        dialog,
+        text="Graph type",
+        bd=1,
+        relief="solid",
+    )
+    type_frame.pack(padx=10, pady=5, fill="x")
+    type_combobox = ttk.Combobox(
+        type_frame,
+        textvariable=type_var,
+        values=import_types,
+        state="readonly",
+    )
+    type_combobox.pack(padx=5, pady=5, fill="x")
+
+    def import_selected():
+        columns = [header[i] for i in columns_listbox.curselection()]
+        if not columns:
+            add_status_text("No columns selected!")
+            return
+        try:
+            cell_manager.import_columns(
+                path, columns, index_var.get(), type_var.get()
+            )
+        except (OSError, ValueError) as e:
+            add_status_text(f"Cannot import {Path(path).name}: {e}")
+            return
+        dialog.destroy()
+
+    import_button = tk.Button(
+        dialog,
+        text="Import",
+        command=import_selected,
+    )
+    import_button.pack(padx=10, pady=5)
+
+
+import_file = tk.Button(
+    navigation,
+    text="Import file",
+    command=open_import_dialog,
+)
+import_file.pack(side="left", padx=10, pady=5)
+
+undo_button = tk.Button(
+    navigation,
+    text="Undo",
+    command=lambda: history.undo(),
+)
+undo_button.pack(side="left", padx=(10, 0), pady=5)
+
+redo_button = tk.Button(
+    navigation,
+    text="Redo",
+    command=lambda: history.redo(),
+)
+redo_button.pack(side="left", padx=5, pady=5)
+
 number_label = tk.Label(
     navigation,
     text=f"Max number of cells: {MAX_CELL_NUMBER}",
@@ -571,6 +1687,18 @@ canvas.bind("<Button-5>", _on_linux_scroll)
 
 cell_manager = CellManager()
 
+# The render cache is opened on the first save, so starting the app
+# doesn't touch the disk
+render_cache: RenderCache | None = None
+
+
+def get_render_cache() -> RenderCache:
+    global render_cache
+    if render_cache is None:
+        render_cache = RenderCache()
+    return render_cache
+
+
 # Plotting ----------------------------------------------------------------
 plotting = tk.LabelFrame(
     root,
@@ -655,6 +1783,31 @@ grid_checkbutton = tk.Checkbutton(
 )
 grid_checkbutton.pack(anchor="w")
 
+history = History(
+    {
+        "title": title_var,
+        "xlabel": xlabel_var,
+        "ylabel": ylabel_var,
+        "legend": legend_var,
+        "grid": grid_var,
+    }
+)
+
+
+def undo_shortcut(event):
+    history.undo()
+    return "break"
+
+
+def redo_shortcut(event):
+    history.redo()
+    return "break"
+
+
+root.bind_all("<Control-z>", undo_shortcut)
+root.bind_all("<Control-y>", redo_shortcut)
+root.bind_all("<Control-Z>", redo_shortcut)
+
 plot_button = tk.Button(
     plotting,
     text="Plot",
@@ -665,6 +1818,215 @@ plot_button = tk.Button(
 )
 plot_button.pack(side="left", padx=10, pady=5)
 
+
+# Function to ask for a file name and save the figure there
+def save_figure():
+    path = filedialog.asksaveasfilename(
+        title="Save figure",
+        defaultextension=".png",
+        filetypes=[("PNG image", "*.png"), ("SVG image", "*.svg")],
+    )
+    if path:
+        cell_manager.save(path)
+
+
+save_button = tk.Button(
+    plotting,
+    text="Save",
+    command=save_figure,
+    width=10,
+    height=2,
+)
+save_button.pack(side="left", padx=10, pady=5)
+
+
+# Function to ask for the window, step and speed of an animation and the
+# file name to save it to
+def open_animate_dialog():
+    dialog = tk.Toplevel(root)
+    dialog.title("Animate")
+
+    window_var = tk.IntVar(value=100)
+    step_var = tk.IntVar(value=10)
+    fps_var = tk.IntVar(value=10)
+    growing_var = tk.BooleanVar(value=False)
+    for text, var, low in [
+        ("Window (values)", window_var, 1),
+        ("Step (values)", step_var, 1),
+        ("Frames per second", fps_var, 1),
+    ]:
+        frame = tk.LabelFrame(
+            dialog,
+            text=text,
+            bd=1,
+            relief="solid",
+        )
+        frame.pack(padx=10, pady=5, fill="x")
+        spinbox = tk.Spinbox(
+            frame,
+            from_=low,
+            to=10**9,
+            textvariable=var,
+            width=10,
+        )
+        spinbox.pack(padx=5, pady=5, fill="x")
+
+    growing_checkbutton = tk.Checkbutton(
+        dialog,
+        text="Growing window",
+        variable=growing_var,
+    )
+    growing_checkbutton.pack(padx=10, anchor="w")
+
+    def animate():
+        try:
+            window = None if growing_var.get() else window_var.get()
+            step = step_var.get()
+            fps = fps_var.get()
+        except tk.TclError:
+            add_status_text("Window, step and speed must be whole numbers!")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Save animation",
+            defaultextension=".gif",
+            filetypes=[("GIF animation", "*.gif"), ("PNG frames", "*.png")],
+        )
+        if path:
+            dialog.destroy()
+            cell_manager.animate(path, window, step, fps)
+
+    animate_button = tk.Button(
+        dialog,
+        text="Save",
+        command=animate,
+    )
+    animate_button.pack(padx=10, pady=5)
+
+
+animate_button = tk.Button(
+    plotting,
+    text="Animate",
+    command=open_animate_dialog,
+    width=10,
+    height=2,
+)
+animate_button.pack(side="left", padx=10, pady=5)
+
+# Memory ------------------------------------------------------------------
+memory_frame = tk.LabelFrame(
+    root,
+    text="Memory",
+    bd=1,
+    relief="solid",
+)
+memory_frame.pack(
+    anchor="w",
+    padx=10,
+    pady=5,
+    fill="x",
+)
+
+memory_limit_var = tk.StringVar(value=str(MEMORY_LIMIT_MB))
+memory_limit_frame = tk.LabelFrame(
+    memory_frame,
+    text="Limit (MB)",
+    bd=1,
+    relief="solid",
+)
+memory_limit_frame.pack(side="left", padx=5, pady=5)
+memory_limit_spinbox = ttk.Spinbox(
+    memory_limit_frame,
+    from_=16,
+    to=1_000_000,
+    textvariable=memory_limit_var,
+    increment=256,
+    width=8,
+)
+memory_limit_spinbox.pack(padx=5, pady=5)
+
+memory_policy_var = tk.StringVar(value=MEMORY_POLICIES[0])
+memory_policy_frame = tk.LabelFrame(
+    memory_frame,
+    text="Over limit",
+    bd=1,
+    relief="solid",
+)
+memory_policy_frame.pack(side="left", padx=5, pady=5)
+memory_policy_combobox = ttk.Combobox(
+    memory_policy_frame,
+    textvariable=memory_policy_var,
+    values=MEMORY_POLICIES,
+    state="readonly",
+    width=10,
+)
+memory_policy_combobox.pack(padx=5, pady=5)
+
+memory_label = tk.Label(
+    memory_frame,
+    anchor="w",
+    justify="left",
+    wraplength=330,
+)
+memory_label.pack(side="left", padx=5, pady=5, fill="x")
+
+
+# Function to show bytes held per cell and in total
+def update_memory_panel():
+    parts = [
+        f"{cell.frame.cget('text')} {number}: {format_bytes(cell.nbytes())}"
+        for number, cell in enumerate(cell_manager.cells.values(), 1)
+    ]
+    parts.append(
+        f"datasets: {format_bytes(dataset_store.resident_bytes())}"
+    )
+    spilled_bytes = dataset_store.spilled_bytes()
+    if spilled_bytes:
+        parts.append(f"on disk: {format_bytes(spilled_bytes)}")
+    history_bytes = history.nbytes()
+    if history_bytes:
+        parts.append(f"undo history: {format_bytes(history_bytes)}")
+    parts.append(f"total: {format_bytes(cell_manager.memory_in_use())}")
+    memory_label.config(text=", ".join(parts))
+
+
+# Function to drop arrays of the undo history and spill datasets to the
+# disk cache until everything fits under the memory limit with needed
+# more bytes
+def relieve_memory(needed: int = 0):
+    limit = int(float(memory_limit_var.get()) * 2**20)
+    excess = cell_manager.memory_in_use() + needed - limit
+    if excess <= 0:
+        return
+    # Arrays kept for undo are only a cache, they go before datasets
+    excess -= history.drop_arrays()
+    if excess <= 0:
+        return
+    spilled = {f"@{name}" for name in dataset_store.spill(excess)}
+    # Cells let go of the spilled arrays and map them on the next build
+    for cell in cell_manager.cells.values():
+        if cell.arrays_key and spilled.intersection(
+            text.strip() for text in cell.arrays_key[0]
+        ):
+            cell.arrays, cell.arrays_key, cell.overlays = [], None, {}
+
+
+# Function to check that new cell data fits under the memory limit,
+# spilling datasets first. Returns the stride to downsample with, or
+# raises if it should be refused
+def fit_memory_limit(needed: int) -> int:
+    relieve_memory(needed)
+    limit = int(float(memory_limit_var.get()) * 2**20)
+    available = limit - cell_manager.memory_in_use()
+    if needed <= available:
+        return 1
+    if memory_policy_var.get() == "refuse" or available <= 0:
+        raise ValueError(
+            f"Data needs {format_bytes(needed)}, only "
+            f"{format_bytes(max(available, 0))} left under the memory limit"
+        )
+    return math.ceil(needed / available)
+
+
 # Status Bar --------------------------------------------------------------
 status_frame = tk.LabelFrame(
     root,
@@ -701,6 +2063,7 @@ def add_status_text(text: str):
 
 
 add_status_text("Welcome to the plotting app!")
+update_memory_panel()
 
 if __name__ == "__main__":
     root.mainloop()
@@ -0,0 +1,183 @@
+from collections import OrderedDict
+from itertools import count
+from pathlib import Path
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+
+DATASET_CACHE_DIR = Path.home() / ".cache" / "plotting-app" / "datasets"
+
+
+class Dataset:
+    def __init__(self, array: np.ndarray, evictable: bool, description: str):
+        self.array = array
+        self.nbytes = array.nbytes
+        # Arrays of Python objects can't be mapped from a file
+        self.evictable = evictable and array.dtype.kind != "O"
+        self.description = description
+        self.path: Path | None = None
+        self.mapped = False
+        self.refs = 0
+
+    @property
+    def resident(self) -> bool:
+        return self.array is not None and not self.mapped
+
+
+# This class keeps named read-only arrays shared by all cells of a session.
+# Cells bind to a dataset by name and the store counts the bindings. Under
+# memory pressure evictable datasets are written to a disk cache and
+# dropped from memory, unbound and least recently used ones first. A
+# spilled dataset is mapped back from its file the next time it is used
+class DatasetStore:
+    def __init__(self, directory=DATASET_CACHE_DIR):
+        self.directory = Path(directory)
+        self.spill_directory: Path | None = None
+        self.files = count(1)
+        # Name -> dataset, ordered from least to most recently used
+        self.entries: OrderedDict[str, Dataset] = OrderedDict()
+        # (name, dtype) -> converted dataset, alive while a cell holds it
+        self.conversions = weakref.WeakValueDictionary()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(
+        self,
+        name: str,
+        array: np.ndarray,
+        evictable: bool = True,
+        description: str = "",
+    ):
+        # Shared between cells, so nobody may change it in place
+        array.flags.writeable = False
+        dataset = Dataset(array, evictable, description)
+        if name in self.entries:
+            # Cells bound to the old dataset are bound to the new one
+            dataset.refs = self.entries[name].refs
+            self.remove(name)
+        self.entries[name] = dataset
+
+    def remove(self, name: str):
+        dataset = self.entries.pop(name)
+        if dataset.path is not None:
+            dataset.path.unlink(missing_ok=True)
+        for key in [key for key in self.conversions if key[0] == name]:
+            self.conversions.pop(key, None)
+
+    def clear(self):
+        for name in list(self.entries):
+            self.remove(name)
+
+    def get(self, name: str) -> np.ndarray:
+        dataset = self.entries[name]
+        self.entries.move_to_end(name)
+        if dataset.array is None:
+            dataset.array = np.load(dataset.path, mmap_mode="r")
+            dataset.mapped = True
+        return dataset.array
+
+    def description(self, name: str) -> str:
+        return self.entries[name].description
+
+    # Function to return a dataset converted with convert(array, dtype).
+    # Cells asking for the same dtype share one converted array
+    def converted(self, name: str, dtype, convert) -> np.ndarray:
+        key = (name, np.dtype(dtype).str)
+        array = self.conversions.get(key)
+        if array is None:
+            source = self.get(name)
+            array = convert(source, np.dtype(dtype))
+            if array is source:
+                return array
+            array.flags.writeable = False
+            self.conversions[key] = array
+        return array
+
+    def has_converted(self, name: str, dtype) -> bool:
+        return (name, np.dtype(dtype).str) in self.conversions
+
+    def bind(self, name: str):
+        if name in self.entries:
+            self.entries[name].refs += 1
+
+    def unbind(self, name: str):
+        if name in self.entries:
+            self.entries[name].refs -= 1
+
+    def refs(self, name: str) -> int:
+        return self.entries[name].refs
+
+    # Function to check whether an array is a dataset or a view of one
+    def is_shared(self, array: np.ndarray) -> bool:
+        shared = {
+            id(dataset.array)
+            for dataset in self.entries.values()
+            if dataset.array is not None
+        }
+        while isinstance(array, np.ndarray):
+            if id(array) in shared:
+                return True
+            array = array.base
+        return False
+
+    # Bytes of datasets held in memory, mapped ones are paged by the system
+    def resident_bytes(self) -> int:
+        return sum(
+            dataset.nbytes
+            for dataset in self.entries.values()
+            if dataset.resident
+        )
+
+    def spilled_bytes(self) -> int:
+        return sum(
+            dataset.nbytes
+            for dataset in self.entries.values()
+            if not dataset.resident
+        )
+
+    def _spill_path(self) -> Path:
+        if self.spill_directory is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.spill_directory = Path(tempfile.mkdtemp(dir=self.directory))
+            # Files of a session are of no use to the next one
+            weakref.finalize(
+                self, shutil.rmtree, self.spill_directory, ignore_errors=True
+            )
+        return self.spill_directory / f"{next(self.files)}.npy"
+
+    # Function to drop at least nbytes of datasets from memory, writing
+    # them to the disk cache first. Returns names of the spilled datasets,
+    # whose arrays must be let go by their users to free the memory
+    def spill(self, nbytes: int) -> list[str]:
+        candidates = sorted(
+            (
+                name
+                for name, dataset in self.entries.items()
+                if dataset.evictable and dataset.resident
+            ),
+            # Stable sort keeps the least recently used first
+            key=lambda name: self.entries[name].refs > 0,
+        )
+        spilled = []
+        freed = 0
+        for name in candidates:
+            if freed >= nbytes:
+                break
+            dataset = self.entries[name]
+            if dataset.path is None:
+                dataset.path = self._spill_path()
+                np.save(dataset.path, dataset.array)
+            dataset.array = None
+            freed += dataset.nbytes
+            spilled.append(name)
+        return spilled
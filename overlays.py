@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+
+SMOOTHING_METHODS = ["None", "Savitzky-Golay", "EMA", "Gaussian"]
+
+# Number of grid points of a density curve
+KDE_GRID_SIZE = 1024
+
+# Kernels shorter than this are applied directly, longer ones with FFT
+DIRECT_KERNEL_SIZE = 64
+
+
+# Function to convolve values with a kernel. Mode "same" keeps the length
+# of values with the kernel centered, "full" returns the whole result.
+# Long kernels go through FFT in O(n log n)
+def convolve(values, kernel, mode: str = "same") -> np.ndarray:
+    if len(kernel) <= DIRECT_KERNEL_SIZE:
+        full = np.convolve(values, kernel, mode="full")
+    else:
+        size = len(values) + len(kernel) - 1
+        fft_size = 1 << (size - 1).bit_length()
+        full = np.fft.irfft(
+            np.fft.rfft(values, fft_size) * np.fft.rfft(kernel, fft_size),
+            fft_size,
+        )[:size]
+
+    if mode == "full":
+        return full
+    start = (len(kernel) - 1) // 2
+    return full[start : start + len(values)]
+
+
+def gaussian_kernel(sigma: float) -> np.ndarray:
+    half = max(math.ceil(4 * sigma), 1)
+    offsets = np.arange(-half, half + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+# Function to replace missing values by linear interpolation
+def fill_missing(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+    if missing.all():
+        raise ValueError("No values to smooth")
+    positions = np.arange(len(values))
+    values = values.copy()
+    values[missing] = np.interp(
+        positions[missing], positions[~missing], values[~missing]
+    )
+    return values
+
+
+# Function to estimate a probability density by binning the data on a
+# regular grid and convolving the counts with a Gaussian kernel, which
+# takes O(n + m log m) for n values and m grid points.
+# Bandwidth defaults to Scott's rule
+def kde(
+    data, grid_size: int = KDE_GRID_SIZE, bandwidth: float | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    data = np.asarray(data, dtype=np.float64)
+    data = data[np.isfinite(data)]
+    if len(data) < 2:
+        raise ValueError("KDE needs at least two values")
+    if bandwidth is None:
+        bandwidth = data.std() * len(data) ** (-1 / 5)
+    if bandwidth <= 0:
+        raise ValueError("KDE needs values that are not all equal")
+
+    low = data.min() - 3 * bandwidth
+    high = data.max() + 3 * bandwidth
+    grid, step = np.linspace(low, high, grid_size, retstep=True)
+
+    # Linear binning: every value is split between its two grid points
+    positions = (data - low) / step
+    left = np.minimum(positions.astype(np.int64), grid_size - 2)
+    weight = positions - left
+    counts = np.bincount(left, 1 - weight, minlength=grid_size)
+    counts += np.bincount(left + 1, weight, minlength=grid_size)
+
+    density = convolve(counts, gaussian_kernel(bandwidth / step))
+    return grid, np.maximum(density, 0) / (len(data) * step)
+
+
+def savitzky_golay(values, window: int, order: int = 2) -> np.ndarray:
+    half = window // 2
+    order = min(order, 2 * half)
+    offsets = np.arange(-half, half + 1)
+    # Least squares fit of a polynomial, its value at the window center
+    vandermonde = np.vander(offsets, order + 1, increasing=True)
+    coefficients = np.linalg.pinv(vandermonde)[0]
+    padded = np.pad(values, half, mode="edge")
+    return convolve(padded, coefficients[::-1])[half : half + len(values)]
+
+
+def exponential_moving_average(values, span: int) -> np.ndarray:
+    alpha = 2 / (span + 1)
+    # Weights below 1e-12 don't change the result, so the infinite
+    # recursion is cut to a finite kernel
+    size = min(
+        math.ceil(math.log(1e-12) / math.log(1 - alpha)) if alpha < 1 else 1,
+        len(values),
+    )
+    weights = alpha * (1 - alpha) ** np.arange(size)
+
+    averages = convolve(values, weights, mode="full")[: len(values)]
+    # The first values have fewer predecessors, renormalize their weights
+    totals = np.cumsum(weights)
+    averages[:size] /= totals
+    averages[size:] /= totals[-1]
+    return averages
+
+
+def gaussian_smooth(values, sigma: float) -> np.ndarray:
+    kernel = gaussian_kernel(sigma)
+    half = len(kernel) // 2
+    # Repeat the edge values, so the ends don't sag towards zero
+    padded = np.pad(values, half, mode="edge")
+    return convolve(padded, kernel)[half : half + len(values)]
+
+
+# Function to smooth values with one of SMOOTHING_METHODS, window is the
+# number of points. The Gaussian kernel spans the window with +-3 sigma
+def smooth(values, method: str, window: int) -> np.ndarray:
+    values = fill_missing(values)
+    window = max(int(window), 1)
+    if len(values) == 0 or window == 1:
+        return values
+    match method:
+        case "Savitzky-Golay":
+            return savitzky_golay(values, window)
+        case "EMA":
+            return exponential_moving_average(values, window)
+        case "Gaussian":
+            return gaussian_smooth(values, window / 6)
+    raise ValueError(f"Unknown smoothing method '{method}'")
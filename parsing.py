@@ -0,0 +1,164 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import mmap
+import multiprocessing
+import os
+import re
+import warnings
+
+import numpy as np
+
+
+# Inputs shorter than this are parsed in one thread
+PARALLEL_PARSE_CHARS = 8 * 2**20
+
+# Start of an ISO-8601 date. numpy also reads words like "now" and "today"
+# as dates, which are meant as text
+ISO_DATE = re.compile(r"[+-]?\d{4,}-\d{2}")
+
+
+# Function to convert comma separated text to a typed array. Long
+# numeric inputs are parsed on all cores unless parallel is False
+def parse_array(text: str, parallel: bool = True) -> np.ndarray:
+    if (
+        parallel
+        and len(text) >= PARALLEL_PARSE_CHARS
+        and (os.cpu_count() or 1) > 1
+    ):
+        try:
+            return parse_parallel(text)
+        except ValueError:
+            # Not all numbers, parse dates and text below
+            pass
+    items = [item.strip() for item in text.split(",")]
+    return to_array([item for item in items if item])
+
+
+def _parse_numbers(text: str) -> np.ndarray:
+    items = text.split(",")
+    try:
+        return np.fromiter(map(float, items), np.float64, len(items))
+    except ValueError:
+        # Empty items, e.g. a trailing comma
+        items = [item for item in items if item.strip()]
+        return np.fromiter(map(float, items), np.float64, len(items))
+
+
+# Parse one chunk of text straight into its slot of the output buffer
+def _parse_into(text: str, output, task: tuple[int, int, int]) -> int:
+    start, end, offset = task
+    values = _parse_numbers(text[start:end])
+    array = np.frombuffer(output, dtype=np.float64)
+    array[offset : offset + len(values)] = values
+    return len(values)
+
+
+# Input text and output buffer of the parse a worker process belongs to.
+# Every parse starts its own pool and forked workers inherit the
+# initializer arguments, so neither the text nor the results are pickled
+_worker_text = ""
+_worker_output = None
+
+
+def _init_worker(text: str, output):
+    global _worker_text, _worker_output
+    _worker_text, _worker_output = text, output
+
+
+def _parse_chunk(task: tuple[int, int, int]) -> int:
+    return _parse_into(_worker_text, _worker_output, task)
+
+
+# Function to parse a long list of numbers on several cores. The text is
+# split at commas into chunks, every worker writes its values into one
+# shared buffer, which becomes the result without another copy.
+# Raises ValueError if the text is not all numbers
+def parse_parallel(text: str, workers: int | None = None) -> np.ndarray:
+    workers = workers or os.cpu_count()
+    # More chunks than workers even out slow chunks
+    chunk_count = workers * 4
+    chunk_size = max(len(text) // chunk_count, 1)
+
+    tasks = []
+    start = offset = 0
+    while start < len(text):
+        end = text.find(",", start + chunk_size)
+        if end == -1:
+            end = len(text)
+        tasks.append((start, end, offset))
+        # Upper bound of values in the chunk
+        offset += text.count(",", start, end) + 1
+        start = end + 1
+
+    output = mmap.mmap(-1, max(offset, 1) * 8)
+    # Text that is not all numbers usually fails in the first chunk,
+    # before the work is spread over the workers
+    counts = [_parse_into(text, output, tasks[0])] if tasks else []
+    rest = tasks[1:]
+    if rest and "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        with context.Pool(
+            min(workers, len(rest)),
+            initializer=_init_worker,
+            initargs=(text, output),
+        ) as pool:
+            counts += pool.map(_parse_chunk, rest)
+    elif rest:
+        with ThreadPoolExecutor(workers) as pool:
+            counts += pool.map(partial(_parse_into, text, output), rest)
+
+    values = np.frombuffer(output, dtype=np.float64)
+    # Close the gaps left by empty items, in place
+    length = 0
+    for (start, end, offset), count in zip(tasks, counts):
+        if offset != length:
+            values[length : length + count] = values[offset : offset + count]
+        length += count
+    return values[:length]
+
+
+def _to_datetime(items: list[str]) -> np.ndarray:
+    for item in items:
+        if item and not ISO_DATE.match(item):
+            raise ValueError(f"'{item}' is not an ISO-8601 date")
+    # Empty items are NaT. Timezone designators are accepted as UTC,
+    # numpy warns about them
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return np.asarray(items, dtype="datetime64[ns]")
+
+
+# Function to convert a list of strings to a typed array: float64 for
+# numbers, datetime64[ns] for ISO-8601 timestamps and str otherwise
+def to_array(items: list[str]) -> np.ndarray:
+    try:
+        return np.asarray(items, dtype=np.float64)
+    except ValueError:
+        pass
+    # Empty fields in numeric columns are treated as missing values
+    if "" in items:
+        try:
+            return np.asarray(
+                [item if item else "nan" for item in items], dtype=np.float64
+            )
+        except ValueError:
+            pass
+    try:
+        return _to_datetime(items)
+    except ValueError:
+        pass
+    return np.asarray(items, dtype=str)
+
+
+# Function to convert a list of strings to an array of the given dtype,
+# empty items become NaN, NaT or empty text. Raises ValueError if an item
+# can't be converted
+def to_array_of(items: list[str], dtype) -> np.ndarray:
+    match np.dtype(dtype).kind:
+        case "f":
+            return np.asarray(
+                [item if item else "nan" for item in items], dtype=np.float64
+            )
+        case "M":
+            return _to_datetime(items)
+    return np.asarray(items, dtype=str)
@@ -0,0 +1,255 @@
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from parsing import to_array
+from rendering import IMAGE_FORMATS, RenderCache, render_figure
+
+
+DEFAULT_PORT = 8765
+
+# Number of requests allowed to wait for a free worker before new ones are
+# rejected with 503
+DEFAULT_QUEUE_SIZE = 32
+
+# Number of last request latencies used for percentiles
+LATENCY_WINDOW = 1000
+
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Keys of cell specs with values typed like the entries of the app
+SERIES_KEYS = ["x", "y", "data"]
+
+_WARM_UP_SPEC = {
+    "cells": [{"type": "plot", "x": [0, 1], "y": [0, 1], "label": "warm"}],
+    "title": "warm",
+    "legend": True,
+}
+
+
+# Worker process ----------------------------------------------------------
+# Function to load matplotlib, its fonts and image writers once per worker
+def _init_worker():
+    import matplotlib
+
+    matplotlib.use("Agg")
+    for fmt in IMAGE_FORMATS:
+        render_figure(_WARM_UP_SPEC, fmt)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+# Function to convert the series of a JSON figure spec like the app parses
+# its entries, so ISO-8601 timestamps are drawn on a time axis
+def normalize_spec(figure_spec: dict) -> dict:
+    cells = []
+    for cell in figure_spec["cells"]:
+        cell = dict(cell)
+        for key in SERIES_KEYS:
+            if isinstance(cell.get(key), list) and cell[key]:
+                cell[key] = to_array(cell[key])
+        cells.append(cell)
+    return {**figure_spec, "cells": cells}
+
+
+# Render service ----------------------------------------------------------
+# This class renders figure specs in a pool of pre-warmed processes,
+# queueing at most queue_size requests and keeping latency statistics
+class RenderService:
+    def __init__(
+        self,
+        workers=None,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        cache: RenderCache | None = None,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.cache = cache
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+        )
+
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    # Start all workers up front, so the first requests don't pay for it
+    def warm_up(self):
+        futures = [self.pool.submit(_ping) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    # Render a figure spec in a worker, returns None when the queue is full
+    def render(self, figure_spec: dict, fmt: str = "png") -> bytes | None:
+        if fmt not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format '{fmt}'")
+        if not isinstance(figure_spec.get("cells"), list):
+            raise ValueError("Figure spec must have a list of cells")
+        figure_spec = normalize_spec(figure_spec)
+
+        with self.lock:
+            if self.pending >= self.workers + self.queue_size:
+                self.rejected += 1
+                return None
+            self.pending += 1
+
+        start = time.perf_counter()
+        try:
+            if self.cache is not None:
+                data = self.cache.render(
+                    figure_spec,
+                    fmt,
+                    renderer=lambda spec, fmt: self.pool.submit(
+                        render_figure, spec, fmt
+                    ).result(),
+                )
+            else:
+                data = self.pool.submit(render_figure, figure_spec, fmt)
+                data = data.result()
+        except Exception:
+            with self.lock:
+                self.failed += 1
+            raise
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+        with self.lock:
+            self.completed += 1
+            self.latencies.append(time.perf_counter() - start)
+        return data
+
+    def metrics(self) -> dict:
+        with self.lock:
+            latencies = np.array(self.latencies)
+            metrics = {
+                "workers": self.workers,
+                "in_flight": min(self.pending, self.workers),
+                "queue_depth": max(self.pending - self.workers, 0),
+                "queue_size": self.queue_size,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+        for p in (50, 90, 99):
+            metrics[f"latency_p{p}_ms"] = (
+                float(np.percentile(latencies, p)) * 1000
+                if len(latencies)
+                else None
+            )
+        if self.cache is not None:
+            metrics["cache"] = self.cache.stats()
+        return metrics
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+# HTTP --------------------------------------------------------------------
+# POST /render?format=png|svg with a JSON figure spec returns the image,
+# GET /metrics returns latency percentiles and queue depth as JSON
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    service: RenderService
+
+    def send_body(self, status, content_type, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, value):
+        body = json.dumps(value).encode()
+        self.send_body(status, "application/json", body)
+
+    def do_GET(self):
+        match urlparse(self.path).path:
+            case "/metrics":
+                self.send_json(200, self.service.metrics())
+            case "/health":
+                self.send_json(200, {"status": "ok"})
+            case _:
+                self.send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/render":
+            self.send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            figure_spec = json.loads(self.rfile.read(length))
+            fmt = parse_qs(url.query).get("format", [None])[0]
+            fmt = fmt or figure_spec.get("format", "png")
+            data = self.service.render(figure_spec, fmt)
+        except Exception as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        if data is None:
+            self.send_json(503, {"error": "Render queue is full"})
+            return
+        self.send_body(200, CONTENT_TYPES[fmt], data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Function to create an HTTP server bound to the render service.
+# Port 0 picks a free port, see server.server_address
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT):
+    handler = type(
+        "BoundRenderRequestHandler",
+        (RenderRequestHandler,),
+        {"service": service},
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render figure specs to PNG/SVG over local HTTP"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument(
+        "--no-cache", action="store_true", help="disable the render cache"
+    )
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else RenderCache()
+    service = RenderService(args.workers, args.queue_size, cache)
+    service.warm_up()
+    server = make_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Rendering on http://{host}:{port} with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+from collections import OrderedDict
+from hashlib import blake2b
+import io
+import os
+from pathlib import Path
+import threading
+import weakref
+
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+import numpy as np
+
+
+IMAGE_FORMATS = ["png", "svg"]
+
+RENDER_CACHE_DIR = Path.home() / ".cache" / "plotting-app" / "renders"
+
+# Default size limit of the render cache on disk
+RENDER_CACHE_BYTES = 256 * 2**20
+
+
+# Drawing ---------------------------------------------------------------
+# A cell spec is a dict with the cell "type" (one of GRAPH_TYPES), its data,
+# its style fields and an optional "overlay" line. A figure spec is a dict
+# with the list of cell specs under "cells" and the title/xlabel/ylabel/
+# legend/grid settings.
+
+
+# Function to show dates on the x axis with concise tick labels
+def format_time_axis(axes):
+    locator = mdates.AutoDateLocator()
+    axes.xaxis.set_major_locator(locator)
+    axes.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
+
+def _values(spec: dict, key: str) -> np.ndarray:
+    return np.asarray(spec.get(key, []))
+
+
+# Histogram bins are a number of bins or an array of bin edges
+def _bins(bins):
+    if bins is None or np.isscalar(bins):
+        return int(bins) if bins else None
+    return np.asarray(bins)
+
+
+# Function to draw one cell spec on the axes. Returns the artist of the
+# cell and of its overlay line (None without overlay), so animations can
+# update them in place
+def draw_cell(axes, spec: dict):
+    match spec["type"]:
+        case "plot":
+            x = _values(spec, "x")
+            y = _values(spec, "y")
+            style = dict(
+                color=spec.get("color"),
+                label=spec.get("label", ""),
+                linewidth=spec.get("linewidth", 1.5),
+                linestyle=spec.get("linestyle", "solid"),
+                marker=spec.get("marker", " "),
+            )
+            if len(x) == 0:
+                (artist,) = axes.plot(y, **style)
+            else:
+                (artist,) = axes.plot(
+                    x,
+                    y,
+                    markersize=float(spec.get("linewidth", 1.5)) + 4.5,
+                    **style,
+                )
+        case "scatter":
+            x = _values(spec, "x")
+            artist = axes.scatter(
+                x,
+                _values(spec, "y"),
+                color=spec.get("color"),
+                label=spec.get("label", ""),
+                marker=spec.get("marker", "."),
+                s=float(spec.get("markersize", 6.0)) ** 2,
+            )
+        case "bar":
+            x = _values(spec, "x")
+            artist = axes.bar(
+                x,
+                _values(spec, "y"),
+                color=spec.get("color"),
+                label=spec.get("label", ""),
+            )
+        case "histogram":
+            x = None
+            _, _, artist = axes.hist(
+                _values(spec, "data"),
+                bins=_bins(spec.get("bins")),
+                color=spec.get("color"),
+                label=spec.get("label", ""),
+            )
+        case "pie":
+            x = None
+            labels = spec.get("labels") or None
+            artist = axes.pie(_values(spec, "data"), labels=labels)
+        case graph_type:
+            raise ValueError(f"Unknown graph type '{graph_type}'")
+
+    # Density curve or smoothed line drawn over the cell
+    overlay = spec.get("overlay")
+    overlay_artist = None
+    if overlay:
+        style = dict(
+            color=overlay.get("color"),
+            label=overlay.get("label", ""),
+            linewidth=2,
+        )
+        overlay_x = _values(overlay, "x")
+        if len(overlay_x) == 0:
+            (overlay_artist,) = axes.plot(_values(overlay, "y"), **style)
+        else:
+            (overlay_artist,) = axes.plot(
+                overlay_x, _values(overlay, "y"), **style
+            )
+
+    if x is not None and x.dtype.kind == "M":
+        format_time_axis(axes)
+    return artist, overlay_artist
+
+
+# Function to apply title, labels, legend and grid of a figure spec
+def apply_settings(axes, figure_spec: dict):
+    if figure_spec.get("title"):
+        axes.set_title(figure_spec["title"])
+    if figure_spec.get("xlabel"):
+        axes.set_xlabel(figure_spec["xlabel"])
+    if figure_spec.get("ylabel"):
+        axes.set_ylabel(figure_spec["ylabel"])
+    if figure_spec.get("legend"):
+        axes.legend()
+    if figure_spec.get("grid"):
+        axes.grid()
+
+
+# Function to render a figure spec to PNG or SVG bytes without a GUI
+def render_figure(figure_spec: dict, fmt: str = "png") -> bytes:
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format '{fmt}'")
+    figure = Figure()
+    axes = figure.add_subplot()
+    for spec in figure_spec.get("cells", []):
+        draw_cell(axes, spec)
+    apply_settings(axes, figure_spec)
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+# Hashing ---------------------------------------------------------------
+# Digests of read-only arrays, so shared datasets are hashed only once.
+# Key is id() of the array, value is (weak reference, digest)
+_digest_cache: dict[int, tuple[weakref.ref, bytes]] = {}
+
+
+def _is_immutable(array: np.ndarray) -> bool:
+    base = array.base
+    return not array.flags.writeable and not (
+        isinstance(base, np.ndarray) and base.flags.writeable
+    )
+
+
+# Function to compute a digest of array contents, dtype and shape
+def array_digest(array: np.ndarray) -> bytes:
+    cached = _digest_cache.get(id(array))
+    if cached is not None and cached[0]() is array:
+        return cached[1]
+
+    hasher = blake2b(digest_size=16)
+    hasher.update(array.dtype.str.encode())
+    hasher.update(repr(array.shape).encode())
+    if array.dtype.kind == "O":
+        hasher.update(repr(array.tolist()).encode())
+    else:
+        hasher.update(np.ascontiguousarray(array))
+    digest = hasher.digest()
+
+    if _is_immutable(array):
+        key = id(array)
+        _digest_cache[key] = (
+            weakref.ref(array, lambda _: _digest_cache.pop(key, None)),
+            digest,
+        )
+    return digest
+
+
+def _update_digest(hasher, value):
+    if isinstance(value, dict):
+        hasher.update(b"{")
+        for key in sorted(value):
+            hasher.update(repr(key).encode())
+            _update_digest(hasher, value[key])
+        hasher.update(b"}")
+    elif isinstance(value, np.ndarray) and value.dtype.kind != "O":
+        hasher.update(b"<")
+        hasher.update(array_digest(value))
+        hasher.update(b">")
+    elif isinstance(value, (list, tuple)) and value and all(
+        isinstance(item, (int, float, str, np.generic)) for item in value
+    ):
+        # Plain lists of values, like data of a JSON spec
+        _update_digest(hasher, np.asarray(value))
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        # Lists of cells or values, hashed one by one so arrays inside
+        # them are not shortened by repr
+        hasher.update(b"[")
+        for item in value:
+            _update_digest(hasher, item)
+            hasher.update(b",")
+        hasher.update(b"]")
+    else:
+        hasher.update(repr(value).encode())
+
+
+# Function to hash a complete figure spec: cell types, data digests,
+# style fields and figure settings
+def spec_digest(figure_spec: dict) -> str:
+    hasher = blake2b(digest_size=20)
+    _update_digest(hasher, figure_spec)
+    return hasher.hexdigest()
+
+
+# Render cache ----------------------------------------------------------
+# This class keeps rendered images on disk, evicting the least recently
+# used ones when the total size exceeds the limit
+class RenderCache:
+    def __init__(
+        self, directory=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_BYTES
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored_bytes = 0
+
+        # File name -> size, ordered from least to most recently used
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        files = [
+            path
+            for path in self.directory.iterdir()
+            if path.suffix[1:] in IMAGE_FORMATS
+        ]
+        for path in sorted(files, key=lambda path: path.stat().st_mtime):
+            size = path.stat().st_size
+            self.entries[path.name] = size
+            self.stored_bytes += size
+        self._evict()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, name: str) -> bytes | None:
+        with self.lock:
+            if name not in self.entries:
+                self.misses += 1
+                return None
+            try:
+                data = (self.directory / name).read_bytes()
+            except OSError:
+                # File was removed behind our back
+                self.stored_bytes -= self.entries.pop(name)
+                self.misses += 1
+                return None
+            # Keep the recency order across restarts
+            os.utime(self.directory / name)
+            self.entries.move_to_end(name)
+            self.hits += 1
+            return data
+
+    def put(self, name: str, data: bytes):
+        with self.lock:
+            (self.directory / name).write_bytes(data)
+            self.stored_bytes += len(data) - self.entries.pop(name, 0)
+            self.entries[name] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while self.stored_bytes > self.max_bytes and self.entries:
+            name, size = self.entries.popitem(last=False)
+            (self.directory / name).unlink(missing_ok=True)
+            self.stored_bytes -= size
+
+    # Function to return the rendered image of a figure spec, rendering it
+    # only when an identical spec is not cached yet
+    def render(
+        self, figure_spec: dict, fmt: str = "png", renderer=render_figure
+    ) -> bytes:
+        name = f"{spec_digest(figure_spec)}.{fmt}"
+        data = self.get(name)
+        if data is None:
+            data = renderer(figure_spec, fmt)
+            self.put(name, data)
+        return data
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+                "entries": len(self.entries),
+                "stored_bytes": self.stored_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        with self.lock:
+            for name in self.entries:
+                (self.directory / name).unlink(missing_ok=True)
+            self.entries.clear()
+            self.stored_bytes = 0
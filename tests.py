@@ -1,12 +1,32 @@
+import json
+import os
+import tempfile
+import threading
+import time
 import tkinter as tk
 import unittest
+import urllib.error
+import urllib.request
 
+import animation
 import course as crs
+import dataset_store
+import overlays
+import parsing
+import render_service
+import rendering
 
 
 # Блокування спливаючих вікон графіків
 crs.plt.show = lambda *args, **kwargs: None
 
+# Кеш рендерів і вивантажені набори у тимчасовій теці, а не в домашній
+cache_directory = tempfile.TemporaryDirectory()
+crs.render_cache = rendering.RenderCache(
+    os.path.join(cache_directory.name, "renders")
+)
+crs.dataset_store.directory = crs.Path(cache_directory.name, "datasets")
+
 
 # Глобальна функція для перевірки вмісту статусного вікна
 def ends_with(text: str) -> bool:
@@ -38,6 +58,55 @@ class TestFunctions(unittest.TestCase):
             crs.get_list(tk.StringVar(value="A, B, C, ")), ["A", "B", "C"]
         )
 
+    def test_parse_array(self):
+        self.assertEqual(crs.parse_array("1, 2, 3, ").tolist(), [1, 2, 3])
+        self.assertEqual(crs.parse_array("A, B, ").tolist(), ["A", "B"])
+        # Часові мітки перетворюються на datetime64
+        times = crs.parse_array("2026-10-17T10:00:00, 2026-10-17T10:01:00")
+        self.assertTrue(crs.is_time(times))
+        # Слова, які numpy читає як дати, лишаються текстом
+        words = crs.parse_array("now, today, NaT")
+        self.assertEqual(words.tolist(), ["now", "today", "NaT"])
+        self.assertTrue(
+            crs.is_time(crs.epoch_to_datetime([1700000000, 1700000060], "s"))
+        )
+
+    def test_parse_parallel(self):
+        values = crs.np.arange(10000) / 4
+        text = ", ".join(map(str, values)) + ", "
+        self.assertTrue(
+            crs.np.array_equal(parsing.parse_parallel(text, 3), values)
+        )
+        # Нечислові дані розбираються послідовно
+        with self.assertRaises(ValueError):
+            parsing.parse_parallel("1, 2, A", 2)
+
+        # Одночасні розбори не змішують вхідні дані
+        texts = [", ".join(["1.5"] * 20000), ", ".join(["2.5"] * 20000)]
+        results = [None, None]
+
+        def parse(i):
+            results[i] = parsing.parse_parallel(texts[i], 2)
+
+        threads = [threading.Thread(target=parse, args=(i,)) for i in (0, 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue((results[0] == 1.5).all())
+        self.assertTrue((results[1] == 2.5).all())
+
+    def test_resample(self):
+        x = crs.np.arange(
+            "2026-10-17T00:00", "2026-10-17T00:03", dtype="datetime64[s]"
+        )
+        y = crs.np.arange(len(x), dtype=float)
+        bucket_x, bucket_y = crs.resample(x, y, "1min", "mean")
+        self.assertEqual(len(bucket_x), 3)
+        self.assertEqual(bucket_y.tolist(), [29.5, 89.5, 149.5])
+        bucket_x, bucket_y = crs.resample(x, y, "1min", "min/max")
+        self.assertEqual(bucket_y.tolist()[:2], [0, 59])
+
     def test_add_status_text(self):
         text = "Hello"
         crs.add_status_text(text)
@@ -145,6 +214,22 @@ class TestGraphsOutput(unittest.TestCase):
         crs.cell_manager.delete_cell(id)
 
 
+# Тести графіків з часовою віссю
+class TestTimeAxis(unittest.TestCase):
+    def test_output_time_plot(self):
+        crs.cell_manager.create_cell("plot")
+        id, cell = next(iter(crs.cell_manager.cells.items()))
+        cell.x.set("1700000000, 1700000001, 1700000070")
+        cell.y.set("4, 5, 6")
+        cell.x_type.set("epoch s")
+        cell.resample_interval.set("1min")
+
+        crs.cell_manager.show()
+        self.assertTrue(ends_with("Successfully plotted!"))
+        crs.plt.close()
+        crs.cell_manager.delete_cell(id)
+
+
 # Тести при вводі некоректних даних
 class TestIncorrectInput(unittest.TestCase):
     def test_incorrect_input(self):
@@ -196,5 +281,540 @@ class TestMaxGraphs(unittest.TestCase):
         crs.cell_manager.cells.clear()
 
 
+# Тести імпорту стовпців з файлу
+class TestImport(unittest.TestCase):
+    def setUp(self):
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, newline=""
+        )
+        file.write("time,a,b\n1,2,3\n2,,5\n3,4,6\n")
+        file.close()
+        self.path = file.name
+        self.stem = os.path.splitext(os.path.basename(self.path))[0]
+
+    def tearDown(self):
+        os.remove(self.path)
+        crs.cell_manager.cells.clear()
+        crs.dataset_store.clear()
+        menu = crs.graph_option_menu["menu"]
+        for i in range(menu.index("end") + 1):
+            menu.entryconfig(i, state="normal")
+
+    def test_read_columns(self):
+        self.assertEqual(crs.read_header(self.path), ["time", "a", "b"])
+        columns = crs.read_columns(self.path, ["a", "b"], chunk_rows=2)
+        self.assertEqual(columns["b"].tolist(), [3, 5, 6])
+        # Порожнє значення стає NaN
+        self.assertTrue(crs.np.isnan(columns["a"][1]))
+
+    def test_chunk_dtypes(self):
+        path = self.path + ".csv"
+        with open(path, "w", newline="") as file:
+            file.write(
+                "time,a,b,c,d\n"
+                "2024-01-01,1,,x,\n"
+                "2024-01-02,2,,y,\n"
+                ",,1,z,\n"
+                "2024-01-04,4,2,w,\n"
+                "2024-01-05,5,3,v,\n"
+                "2024-01-06,a,4,u,\n"
+            )
+        self.addCleanup(os.remove, path)
+        columns = crs.read_columns(
+            path, ["time", "a", "b", "c", "d"], chunk_rows=2
+        )
+        # Тип стовпця визначає перший непорожній фрагмент
+        self.assertEqual(columns["time"].dtype, crs.np.dtype("datetime64[ns]"))
+        self.assertTrue(crs.np.isnat(columns["time"][2]))
+        self.assertEqual(columns["b"].tolist()[2:], [1, 2, 3, 4])
+        self.assertTrue(crs.np.isnan(columns["b"][:2]).all())
+        self.assertEqual(columns["c"].tolist(), list("xyzwvu"))
+        self.assertTrue(crs.np.isnan(columns["d"]).all())
+        # Текст лише якщо значення не перетворюється, без "1.0"
+        self.assertEqual(columns["a"].tolist(), ["1", "2", "", "4", "5", "a"])
+
+    def test_import_columns(self):
+        crs.cell_manager.import_columns(
+            self.path, ["a", "b"], "time", "plot"
+        )
+        self.assertEqual(len(crs.cell_manager.cells), 2)
+        first, second = crs.cell_manager.cells.values()
+        # Стовпець індексу спільний для всіх графіків без копіювання
+        self.assertIs(crs.get_data(first.x), crs.get_data(second.x))
+        self.assertEqual(second.y.get(), f"@{self.stem}/b")
+
+        crs.cell_manager.show()
+        self.assertTrue(ends_with("Successfully plotted!"))
+        crs.plt.close()
+
+    def test_import_again(self):
+        crs.cell_manager.import_columns(
+            self.path, ["b"], crs.ROW_NUMBER_COLUMN, "histogram"
+        )
+        first = next(iter(crs.cell_manager.cells.values()))
+        first.spec()
+        with open(self.path, "w", newline="") as file:
+            file.write("time,a,b\n1,2,7\n")
+        crs.cell_manager.import_columns(
+            self.path, ["b"], crs.ROW_NUMBER_COLUMN, "histogram"
+        )
+        second = list(crs.cell_manager.cells.values())[1]
+        # Повторний імпорт не підміняє дані наявних клітинок
+        self.assertEqual(second.data.get(), f"@{self.stem} (2)/b")
+        self.assertEqual(list(first.spec()["data"]), [3, 5, 6])
+        self.assertEqual(list(second.spec()["data"]), [7])
+
+
+# Тести вставки великих даних
+class TestLargePaste(unittest.TestCase):
+    def test_large_paste(self):
+        crs.cell_manager.create_cell("histogram")
+        id, cell = next(iter(crs.cell_manager.cells.items()))
+        values = ", ".join(["1.5"] * crs.LARGE_PASTE_CHARS)
+        crs.root.clipboard_clear()
+        crs.root.clipboard_append(values)
+
+        cell.data_input.entry.event_generate("<<Paste>>")
+        while not cell.data.get().startswith("@"):
+            crs.root.update()
+            time.sleep(0.01)
+
+        # Сирий текст не потрапляє у віджет, лише посилання на масив
+        self.assertLess(len(cell.data.get()), 100)
+        self.assertEqual(len(crs.get_data(cell.data)), crs.LARGE_PASTE_CHARS)
+        self.assertIn("float64", cell.data_input.summary.cget("text"))
+
+        crs.cell_manager.show()
+        self.assertTrue(ends_with("Successfully plotted!"))
+        crs.plt.close()
+        crs.cell_manager.delete_cell(id)
+
+
+# Тести точності даних та обліку пам'яті
+class TestMemory(unittest.TestCase):
+    def tearDown(self):
+        crs.memory_limit_var.set(str(crs.MEMORY_LIMIT_MB))
+        crs.memory_policy_var.set("refuse")
+        for id in list(crs.cell_manager.cells):
+            crs.cell_manager.delete_cell(id)
+
+    def test_precision(self):
+        crs.cell_manager.create_cell("plot")
+        id, cell = next(iter(crs.cell_manager.cells.items()))
+        cell.y.set("1, 2, 3, 4")
+        cell.dtype.set("float32")
+
+        crs.cell_manager.show()
+        crs.plt.close()
+        self.assertEqual(cell.arrays[1].dtype, crs.np.float32)
+        self.assertEqual(cell.nbytes(), 16)
+        self.assertIn("16 B", crs.memory_label.cget("text"))
+
+    def test_memory_limit(self):
+        crs.cell_manager.create_cell("histogram")
+        id, cell = next(iter(crs.cell_manager.cells.items()))
+        cell.data.set(", ".join(["1"] * 1000))
+        crs.memory_limit_var.set("0.001")
+
+        # Дані, що перевищують ліміт, відхиляються
+        crs.cell_manager.show()
+        self.assertEqual(cell.frame.cget("bg"), "#FFCCCC")
+
+        # Або проріджуються
+        crs.memory_policy_var.set("downsample")
+        self.assertLess(len(cell.spec()["data"]), 1000)
+        # Після підняття ліміту дані читаються повністю
+        crs.memory_limit_var.set(str(crs.MEMORY_LIMIT_MB))
+        self.assertEqual(len(cell.spec()["data"]), 1000)
+
+
+# Тести кривих щільності та згладжування
+class TestOverlays(unittest.TestCase):
+    def test_kde(self):
+        data = crs.np.random.default_rng(0).normal(size=10000)
+        grid, density = overlays.kde(data)
+        area = (density * (grid[1] - grid[0])).sum()
+        self.assertAlmostEqual(area, 1, places=3)
+
+    def test_smooth(self):
+        values = crs.np.arange(100, dtype=float) ** 2
+        for method in overlays.SMOOTHING_METHODS[1:]:
+            self.assertEqual(len(overlays.smooth(values, method, 7)), 100)
+        # Поліном другого степеня не змінюється фільтром Савіцкого-Голея
+        smoothed = overlays.smooth(values, "Savitzky-Golay", 7)
+        self.assertTrue(crs.np.allclose(smoothed[5:-5], values[5:-5]))
+        # Стала лінія не провисає на краях
+        constant = crs.np.full(500, 10.0)
+        for method in overlays.SMOOTHING_METHODS[1:]:
+            smoothed = overlays.smooth(constant, method, 101)
+            self.assertTrue(crs.np.allclose(smoothed, 10.0))
+
+    def test_output_overlays(self):
+        crs.cell_manager.create_cell("histogram")
+        crs.cell_manager.create_cell("plot")
+        hist, plot = crs.cell_manager.cells.values()
+        hist.data.set("1, 2, 2, 3, 3, 3")
+        hist.kde.set(True)
+        plot.y.set("1, 3, 2, 4, 3, 5")
+        plot.smoothing.set("EMA")
+        plot.smoothing_window.set("3")
+
+        crs.cell_manager.show()
+        self.assertTrue(ends_with("Successfully plotted!"))
+        # Повторне увімкнення бере криву з кешу комірки
+        self.assertIs(hist.spec()["overlay"]["y"], hist.spec()["overlay"]["y"])
+        crs.plt.close()
+        for id in list(crs.cell_manager.cells):
+            crs.cell_manager.delete_cell(id)
+
+
+# Тести кешу відрендерених графіків
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = rendering.RenderCache(self.directory.name)
+        self.spec = {
+            "cells": [{"type": "bar", "x": [1, 2], "y": [3, 4]}],
+            "title": "Title",
+        }
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cache_hit(self):
+        first = self.cache.render(self.spec)
+        second = self.cache.render(dict(self.spec))
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.stats()["stored_bytes"], len(first))
+
+        # Зміна будь-якого налаштування дає інший ключ
+        self.cache.render({**self.spec, "grid": True})
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_large_arrays(self):
+        # Масиви, що відрізняються лише посередині, дають різні ключі
+        first = crs.np.arange(10_000.0)
+        second = first.copy()
+        second[5000] = -1
+        specs = [
+            {"cells": [{"type": "plot", "x": [], "y": y}]}
+            for y in (first, second, list(first))
+        ]
+        digests = [rendering.spec_digest(spec) for spec in specs]
+        self.assertNotEqual(digests[0], digests[1])
+        self.assertEqual(digests[0], digests[2])
+
+    def test_eviction(self):
+        first = len(self.cache.render(self.spec))
+        second = len(self.cache.render({**self.spec, "title": "Other"}))
+        self.cache.max_bytes = max(first, second)
+        self.cache._evict()
+        # Залишається лише останнє зображення
+        self.assertEqual(len(self.cache.entries), 1)
+        self.assertEqual(self.cache.stored_bytes, second)
+
+    def test_save(self):
+        crs.cell_manager.create_cell("plot")
+        id, cell = next(iter(crs.cell_manager.cells.items()))
+        cell.y.set("4, 5, 6")
+        path = os.path.join(self.directory.name, "figure.png")
+
+        crs.cell_manager.save(path)
+        self.assertTrue(os.path.exists(path))
+        crs.cell_manager.delete_cell(id)
+
+
+# Тести локального HTTP сервісу рендерингу
+class TestRenderService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = render_service.RenderService(workers=1)
+        cls.service.warm_up()
+        cls.server = render_service.make_server(cls.service, port=0)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.shutdown()
+
+    def post(self, path, spec):
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(spec).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            return response.headers["Content-Type"], response.read()
+
+    def test_render(self):
+        spec = {"cells": [{"type": "plot", "y": [1, 3, 2]}], "grid": True}
+        content_type, body = self.post("/render", spec)
+        self.assertEqual(content_type, "image/png")
+        self.assertTrue(body.startswith(b"\x89PNG"))
+
+        content_type, body = self.post("/render?format=svg", spec)
+        self.assertEqual(content_type, "image/svg+xml")
+
+        with urllib.request.urlopen(self.url + "/metrics") as response:
+            metrics = json.loads(response.read())
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertIsNotNone(metrics["latency_p50_ms"])
+
+    def test_time_axis(self):
+        times = ["2024-01-01T00:00", "2024-01-02T12:00", "2024-01-05T06:00"]
+        spec = {"cells": [{"type": "plot", "x": times, "y": [1, 3, 2]}]}
+        content_type, body = self.post("/render", spec)
+        # Мітки часу малюються на осі часу, як у застосунку
+        x = crs.np.array(times, dtype="datetime64[ns]")
+        expected = rendering.render_figure(
+            {"cells": [{"type": "plot", "x": x, "y": [1, 3, 2]}]}, "png"
+        )
+        self.assertEqual(body, expected)
+
+    def test_bad_spec(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.post("/render", {"cells": [{"type": "unknown"}]})
+        self.assertEqual(context.exception.code, 400)
+
+
+# Тести спільного сховища наборів даних
+class TestDatasetStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = dataset_store.DatasetStore(self.directory.name)
+
+    def tearDown(self):
+        self.store.clear()
+        self.directory.cleanup()
+
+    def test_spill(self):
+        self.store.add("a", crs.np.arange(1000.0))
+        self.store.add("b", crs.np.ones(1000))
+        self.store.bind("a")
+        self.assertFalse(self.store.get("a").flags.writeable)
+
+        # Першим вивантажується набір без посилань
+        self.assertEqual(self.store.spill(1), ["b"])
+        self.assertEqual(self.store.resident_bytes(), 8000)
+        self.assertEqual(self.store.spilled_bytes(), 8000)
+
+        # Після вивантаження набір відображається з диска
+        array = self.store.get("b")
+        self.assertIsInstance(array, crs.np.memmap)
+        self.assertEqual(array.sum(), 1000)
+
+    def test_converted(self):
+        self.store.add("a", crs.np.arange(10))
+        first = self.store.converted("a", "float32", crs.to_dtype)
+        second = self.store.converted("a", "float32", crs.to_dtype)
+        self.assertIs(first, second)
+        self.assertEqual(first.dtype, crs.np.float32)
+
+    def test_cells_share_dataset(self):
+        # Масиви попередніх тестів, що лишились в історії
+        before = crs.cell_manager.memory_in_use()
+        cells = [crs.cell_manager.create_cell("histogram") for _ in range(3)]
+        crs.add_dataset("shared", crs.np.arange(1000))
+        for cell in cells:
+            cell.data.set("@shared")
+            cell.dtype.set("float32")
+        self.assertEqual(crs.dataset_store.refs("shared"), 3)
+
+        crs.cell_manager.show()
+        crs.plt.close()
+        self.assertIs(cells[0].arrays[0], cells[2].arrays[0])
+        # Набір і одна його копія у float32
+        self.assertEqual(
+            crs.cell_manager.memory_in_use() - before, 8000 + 4000
+        )
+
+        for cell in cells:
+            crs.cell_manager.delete_cell(cell.id)
+        self.assertEqual(crs.dataset_store.refs("shared"), 0)
+        crs.dataset_store.remove("shared")
+
+    def test_memory_pressure(self):
+        cell = crs.cell_manager.create_cell("histogram")
+        crs.add_dataset("big", crs.np.arange(100_000.0))
+        cell.data.set("@big")
+
+        # Набір, що не вміщується в ліміт, вивантажується на диск
+        crs.memory_limit_var.set("0.5")
+        crs.relieve_memory()
+        self.assertEqual(crs.dataset_store.resident_bytes(), 0)
+
+        # І відображається з диска під час побудови
+        self.assertEqual(len(cell.spec()["data"]), 100_000)
+        self.assertIsInstance(cell.arrays[0], crs.np.memmap)
+
+        crs.memory_limit_var.set(str(crs.MEMORY_LIMIT_MB))
+        crs.cell_manager.delete_cell(cell.id)
+        crs.dataset_store.remove("big")
+
+
+    def test_release(self):
+        cell = crs.cell_manager.create_cell("histogram")
+        crs.add_dataset("first", crs.np.arange(10.0))
+        cell.data.set("@first")
+        crs.history.commit()
+        cell.data.set("1, 2")
+        crs.history.commit()
+        # Набір, на який посилається крок скасування, лишається
+        self.assertIn("first", crs.dataset_store)
+
+        crs.history.undo_steps.clear()
+        cell.data.set("1, 2, 3")
+        crs.history.commit()
+        # А набір без посилань звільняється
+        self.assertNotIn("first", crs.dataset_store)
+        crs.cell_manager.delete_cell(cell.id)
+
+
+# Тести скасування і повторення дій
+class TestHistory(unittest.TestCase):
+    def test_undo_delete(self):
+        history = crs.history
+        cell = crs.cell_manager.create_cell("plot")
+        cell.y.set("1, 2, 3")
+        history.commit()
+        cell.spec()
+        arrays = cell.arrays
+
+        crs.cell_manager.delete_cell(cell.id)
+        history.undo()
+        restored = crs.cell_manager.cells[cell.id]
+        self.assertEqual(restored.y.get(), "1, 2, 3")
+        # Розібрані масиви не копіюються
+        self.assertIs(restored.arrays, arrays)
+
+        history.redo()
+        self.assertNotIn(cell.id, crs.cell_manager.cells)
+        history.undo()
+        crs.cell_manager.delete_cell(cell.id)
+
+    def test_memory(self):
+        history = crs.history
+        history.drop_arrays()
+        cell = crs.cell_manager.create_cell("histogram")
+        cell.data.set(", ".join(["1"] * 1000))
+        cell.spec()
+        crs.cell_manager.delete_cell(cell.id)
+        # Масиви видаленої клітинки враховуються в ліміті
+        self.assertEqual(history.nbytes(), 8000)
+        self.assertEqual(crs.cell_manager.memory_in_use(), 8000)
+
+        # і звільняються першими під тиском пам'яті
+        crs.memory_limit_var.set("0.001")
+        try:
+            crs.relieve_memory()
+        finally:
+            crs.memory_limit_var.set(str(crs.MEMORY_LIMIT_MB))
+        self.assertEqual(history.nbytes(), 0)
+        history.undo()
+        restored = crs.cell_manager.cells[cell.id]
+        self.assertEqual(len(restored.spec()["data"]), 1000)
+        crs.cell_manager.delete_cell(cell.id)
+
+    def test_undo_edits(self):
+        history = crs.history
+        cell = crs.cell_manager.create_cell("histogram")
+        cell.data.set("1, 2")
+        cell.data.set("1, 2, 3")
+        crs.title_var.set("Title")
+        history.commit()
+        history.undo()
+        self.assertEqual(cell.data.get(), "")
+        self.assertEqual(crs.title_var.get(), "")
+
+        # Незмінені клітинки спільні для сусідніх знімків
+        other = crs.cell_manager.create_cell("histogram")
+        other.bins.set("5")
+        history.commit()
+        self.assertIs(history.undo_steps[-1][0][0], history.current[0][0])
+
+        crs.cell_manager.delete_cell(other.id)
+        crs.cell_manager.delete_cell(cell.id)
+
+
+# Тести анімації ковзним вікном і знімками
+class TestAnimation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_frames(self):
+        spec = {"cells": [{"type": "plot", "y": list(range(10))}]}
+        self.assertEqual(animation.frame_count(spec, window=4, step=2), 4)
+        self.assertEqual(animation.frame_count(spec, step=3), 4)
+
+        frame = animation.frame_spec(spec, 1, window=4, step=2)["cells"][0]
+        self.assertEqual(list(frame["x"]), [2, 3, 4, 5])
+        self.assertEqual(list(frame["y"]), [2, 3, 4, 5])
+
+        # Знімки замінюють дані клітинки
+        spec = {
+            "cells": [
+                {
+                    "type": "histogram",
+                    "frames": [{"data": [1, 2]}, {"data": [3]}],
+                }
+            ]
+        }
+        self.assertEqual(animation.frame_count(spec), 2)
+        frame = animation.frame_spec(spec, 1)["cells"][0]
+        self.assertEqual(list(frame["data"]), [3])
+
+    def test_overlay_window(self):
+        x = crs.np.arange(30.0) * 2
+        y = crs.np.arange(30.0)
+        spec = {
+            "cells": [
+                {"type": "plot", "x": x, "y": y, "overlay": {"x": x, "y": y}}
+            ]
+        }
+        frame = animation.frame_spec(spec, 1, window=10, step=5)["cells"][0]
+        # Згладжена крива вирізається тим самим вікном, що й ряд
+        self.assertEqual(list(frame["overlay"]["x"]), list(x[5:15]))
+        self.assertEqual(list(frame["overlay"]["y"]), list(y[5:15]))
+
+        path = os.path.join(self.directory.name, "smoothed.gif")
+        self.assertEqual(animation.render_animation(spec, path, 10, 5), 5)
+
+    def test_reuse_artists(self):
+        spec = animation.prepare_animation(
+            {"cells": [{"type": "histogram", "data": list(range(50))}]}, 10, 5
+        )
+        renderer = animation.FrameRenderer()
+        renderer.render(animation.frame_spec(spec, 0, 10, 5))
+        artists = renderer.artists
+        image = renderer.render(animation.frame_spec(spec, 3, 10, 5)).copy()
+        self.assertIs(renderer.artists, artists)
+
+        # Кадр, намальований з нуля, має бути таким самим
+        frame = animation.frame_spec(spec, 3, 10, 5)
+        renderer.draw(frame)
+        self.assertTrue((renderer.render(frame) == image).all())
+
+    def test_animate(self):
+        crs.cell_manager.create_cell("plot")
+        id, cell = next(iter(crs.cell_manager.cells.items()))
+        cell.y.set(", ".join(map(str, range(30))))
+
+        path = os.path.join(self.directory.name, "animation.gif")
+        crs.cell_manager.animate(path, window=10, step=5)
+        self.assertTrue(os.path.exists(path))
+
+        path = os.path.join(self.directory.name, "frames.png")
+        crs.cell_manager.animate(path, step=10)
+        self.assertEqual(len(os.listdir(self.directory.name)), 4)
+        crs.cell_manager.delete_cell(id)
+
+
 if __name__ == "__main__":
     unittest.main()